@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bin'))
+
+from scheme_store import INVITE_STATUSES, verify_status_counts
+from scheme_journal import JournalSchemeStore
+
+# Measures the write-behind journal store on synthetic invites: journal
+# append throughput with grouped fsyncs, compaction time, and startup time
+# from a snapshot plus a journal tail.
+
+
+def dir_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main(invites, schemes, group_size, tail_updates):
+    directory = tempfile.mkdtemp(prefix='btws_journal_bench_')
+    store = JournalSchemeStore(directory)
+    now = datetime.now()
+    scheme_names = [f"scheme{i}" for i in range(schemes)]
+    for name in scheme_names:
+        store.create_scheme(name, f"Synthetic scheme {name}")
+
+    start = time.perf_counter()
+    for user_id in range(invites):
+        store.add_invite(random.choice(scheme_names), user_id, {
+            'user_name': f"user{user_id}", 'email': f"user{user_id}@example.com", 'cell': '555-0100',
+            'color': 'teal', 'status': 'Pending', 'submit_date': now, 'last_modified': now,
+        })
+        if user_id % group_size == group_size - 1:
+            store.flush()
+    store.flush()
+    elapsed = time.perf_counter() - start
+    print(f"journal append: {invites} invites in {elapsed:.2f}s ({invites / elapsed:,.0f} records/s, "
+          f"fsync every {group_size} records)")
+    print(f"journal size: {dir_size(directory) / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    store.compact()
+    print(f"compaction: {time.perf_counter() - start:.2f}s, snapshot size {dir_size(directory) / 1e6:.1f} MB")
+
+    invites_by_user = {invite['user_id']: invite['scheme'] for name in scheme_names for invite in store.scheme_invites(name)}
+    for _ in range(tail_updates):
+        user_id = random.randrange(invites)
+        store.update_invite(invites_by_user[user_id], user_id, status=random.choice(INVITE_STATUSES), last_modified=now)
+    store.close()
+
+    start = time.perf_counter()
+    reloaded = JournalSchemeStore(directory)
+    elapsed = time.perf_counter() - start
+    print(f"startup: snapshot of {invites} invites + {tail_updates} journal records in {elapsed:.2f}s")
+    mismatches = verify_status_counts(reloaded)
+    print(f"status counters after reload: {'OK' if not mismatches else mismatches}")
+    reloaded.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the journal-backed scheme store.")
+    parser.add_argument("-n", "--invites", type=int, default=100000, help="Number of synthetic invites (default 100000)")
+    parser.add_argument("-s", "--schemes", type=int, default=50, help="Number of schemes to spread them over (default 50)")
+    parser.add_argument("-g", "--group-size", type=int, default=1000, help="Records per grouped fsync (default 1000)")
+    parser.add_argument("-t", "--tail", type=int, default=10000, help="Status updates journaled after the snapshot (default 10000)")
+    args = parser.parse_args()
+    main(args.invites, args.schemes, args.group_size, args.tail)
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bin'))
+
+from result_cache import ResultCache
+from speech_backends import BYTES_PER_SECOND, FakeBackend
+from translate_mp3_lyrics_to_eng import output_path, transcribe_chunks, translate_file
+
+# Measures the transcription pipeline with FakeBackend standing in for the
+# speech and translation APIs, so no network or billing is involved.
+#
+# Without --audio: wall time for chunk transcription of a long recording at
+# several --workers settings, with an optional share of calls failing and
+# being retried. With --audio FILE: the whole pipeline (ffmpeg decode,
+# silence-aware chunking, transcription, translation, output) on a real
+# file, once with a cold cache and once warm, per worker count.
+
+
+def make_chunks(count):
+    # Streamed like iter_audio_chunks would: (offset, PCM) one chunk at a time
+    for i in range(count):
+        yield i * 60, os.urandom(60 * BYTES_PER_SECOND)
+
+
+def bench_chunks(chunks, backend, worker_counts):
+    print(f"{chunks} chunks of 60s, {backend.latency * 1000:.0f}ms per call, {backend.failure_rate:.0%} failures")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results, _ = transcribe_chunks(make_chunks(chunks), 'de', backend, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        in_order = all(results[i][0][0] < results[i + 1][0][0] for i in range(len(results) - 1))
+        print(f"workers={workers:<3} {elapsed:7.2f}s  speedup {baseline / elapsed:5.1f}x  "
+              f"words {sum(map(len, results))}  chunks in timestamp order: {in_order}")
+
+
+def bench_end_to_end(audio_file, backend, worker_counts):
+    print(f"{audio_file}, {backend.latency * 1000:.0f}ms per call, {backend.failure_rate:.0%} failures")
+    for workers in worker_counts:
+        directory = tempfile.mkdtemp(prefix='btws_transcribe_bench_')
+        cache = ResultCache(os.path.join(directory, 'cache'))
+        output_file = output_path(audio_file, directory)
+        for run in ('cold', 'warm'):
+            start = time.perf_counter()
+            result = translate_file(audio_file, output_file, None, 2, backend, workers, cache)
+            elapsed = time.perf_counter() - start
+            print(f"workers={workers:<3} {run} cache {elapsed:7.2f}s  {result['audio_seconds'] / 60 / (elapsed / 60):7.1f} audio-min/min  "
+                  f"chunks {result['chunks']}  cache hits {cache.summary()}")
+            cache.hits.clear()
+            cache.misses.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the transcription pipeline offline with a fake backend.")
+    parser.add_argument("-a", "--audio", help="Run the whole pipeline on this MP3/WAV (needs ffmpeg) instead of synthetic chunks")
+    parser.add_argument("-n", "--chunks", type=int, default=60, help="Number of synthetic 60s chunks (default 60, a one hour file)")
+    parser.add_argument("-l", "--latency", type=float, default=0.5, help="Simulated seconds per backend call (default 0.5)")
+    parser.add_argument("-f", "--failure-rate", type=float, default=0.0, help="Share of backend calls that fail and get retried (default 0)")
+    parser.add_argument("-w", "--workers", type=int, nargs='+', default=[1, 4, 8, 16], help="Worker counts to compare")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    backend = FakeBackend(latency=args.latency, failure_rate=args.failure_rate)
+    if args.audio:
+        bench_end_to_end(args.audio, backend, args.workers)
+    else:
+        bench_chunks(args.chunks, backend, args.workers)
@@ -0,0 +1,270 @@
+import sys
+import types
+import asyncio
+import itertools
+
+# Local stand-in for the parts of discord.py the bots use, so they can be
+# driven offline. Every API call (send, fetch_user, DMs, edits) sleeps for a
+# simulated round trip and is counted; wait_for checks every pending
+# predicate against every dispatched message, the way discord.py does.
+
+_ids = itertools.count(10**17)
+
+
+class Stats:
+    def __init__(self):
+        self.api_calls = {}
+        self.predicate_checks = 0
+        self.messages_dispatched = 0
+
+    def count(self, kind):
+        self.api_calls[kind] = self.api_calls.get(kind, 0) + 1
+
+
+stats = Stats()
+api_latency = 0.0  # seconds per simulated API round trip
+
+
+async def _api(kind):
+    stats.count(kind)
+    if api_latency:
+        await asyncio.sleep(api_latency)
+
+
+class NotFound(Exception):
+    pass
+
+
+class HTTPException(Exception):
+    pass
+
+
+class Forbidden(HTTPException):
+    pass
+
+
+class Intents:
+    @classmethod
+    def default(cls):
+        return cls()
+
+
+class ButtonStyle:
+    primary = 1
+    secondary = 2
+
+
+class File:
+    def __init__(self, fp, filename=None):
+        self.filename = filename
+        self.size = len(fp.read())
+
+
+class Message:
+    def __init__(self, content=None, author=None, channel=None, guild=None, attachments=()):
+        self.id = next(_ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.attachments = list(attachments)
+
+    async def edit(self, content=None, view=None):
+        await _api('edit')
+        if content is not None:
+            self.content = content
+
+
+class User:
+    def __init__(self, name, user_id=None):
+        self.id = user_id or next(_ids)
+        self.name = name
+        self.display_name = name
+        self.discriminator = '0'
+        self.dms = []
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        await _api('dm')
+        self.dms.append(content)
+        return Message(content)
+
+
+class Channel:
+    def __init__(self, name, guild=None):
+        self.id = next(_ids)
+        self.name = name
+        self.guild = guild
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await _api('send')
+        message = Message(content, channel=self)
+        self.sent.append(message)
+        return message
+
+
+class Guild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.channels = [Channel('schemebot', self)]
+        self.members = {}
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+
+class Context:
+    def __init__(self, bot, author, channel, guild, command_name, attachments=()):
+        self.bot = bot
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.command = types.SimpleNamespace(name=command_name)
+        self.message = Message(f"!{command_name}", author, channel, guild, attachments)
+        self.replies = asyncio.Queue()
+
+    async def send(self, content=None, **kwargs):
+        await _api('send')
+        message = Message(content, channel=self.channel)
+        self.replies.put_nowait(message)
+        return message
+
+
+class View:
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+
+
+def button(**kwargs):
+    return lambda func: func
+
+
+def utils_get(iterable, **attrs):
+    for item in iterable:
+        if all(getattr(item, key) == value for key, value in attrs.items()):
+            return item
+    return None
+
+
+class Bot:
+    def __init__(self, command_prefix='!', intents=None):
+        self.user = User('btws-bot')
+        self.commands = {}
+        self.guilds = {}
+        self.users = {}
+        self._listeners = {}
+        self._extra_events = {}  # 'on_message' -> [coroutine functions] from add_listener
+        self._before_invoke = None
+        self._after_invoke = None
+
+    def command(self, name=None, **kwargs):
+        def register(func):
+            self.commands[name or func.__name__] = func
+            return func
+        return register
+
+    def event(self, coro):
+        setattr(self, coro.__name__, coro)
+        return coro
+
+    def add_listener(self, func, name=None):
+        self._extra_events.setdefault(name or func.__name__, []).append(func)
+
+    def before_invoke(self, coro):
+        self._before_invoke = coro
+        return coro
+
+    def after_invoke(self, coro):
+        self._after_invoke = coro
+        return coro
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id):
+        await _api('fetch_user')
+        user = self.users.get(user_id)
+        if user is None:
+            raise NotFound(user_id)
+        return user
+
+    def open_waiters(self):
+        return sum(len(listeners) for listeners in self._listeners.values())
+
+    def wait_for(self, event, *, check=None, timeout=None):
+        future = asyncio.get_running_loop().create_future()
+        self._listeners.setdefault(event, []).append((future, check))
+        return asyncio.wait_for(future, timeout)
+
+    def dispatch(self, event, *args):
+        if event == 'message':
+            stats.messages_dispatched += 1
+        listeners = self._listeners.get(event, [])
+        remaining = []
+        for future, check in listeners:
+            if future.done():
+                continue
+            stats.predicate_checks += 1
+            if check is None or check(*args):
+                future.set_result(args[0] if len(args) == 1 else args)
+            else:
+                remaining.append((future, check))
+        self._listeners[event] = remaining
+        handler = getattr(self, f"on_{event}", None)
+        if handler is not None:
+            asyncio.ensure_future(handler(*args))
+        for listener in self._extra_events.get(f"on_{event}", []):
+            asyncio.ensure_future(listener(*args))
+
+    async def invoke(self, name, ctx, *args, **kwargs):
+        if self._before_invoke:
+            await self._before_invoke(ctx)
+        try:
+            await self.commands[name](ctx, *args, **kwargs)
+        finally:
+            if self._after_invoke:
+                await self._after_invoke(ctx)
+
+    # As if the user typed the command: discord.py runs it from the bot's own
+    # on_message, scheduled before listeners added with add_listener, and
+    # those listeners then see the command message too
+    async def invoke_typed(self, name, ctx, *args, **kwargs):
+        task = asyncio.ensure_future(self.invoke(name, ctx, *args, **kwargs))
+        self.dispatch('message', ctx.message)
+        await task
+
+    def run(self, token):
+        raise RuntimeError("The fake bot cannot connect to Discord")
+
+
+# Puts the stand-in modules where `import discord` / `from discord.ext import
+# commands` will find them. Must run before the bot scripts are imported.
+def install():
+    discord = types.ModuleType('discord')
+    errors = types.ModuleType('discord.errors')
+    ext = types.ModuleType('discord.ext')
+    commands = types.ModuleType('discord.ext.commands')
+    ui = types.ModuleType('discord.ui')
+    utils = types.ModuleType('discord.utils')
+
+    errors.Forbidden = Forbidden
+    errors.NotFound = NotFound
+    errors.HTTPException = HTTPException
+    ui.View = View
+    ui.button = button
+    utils.get = utils_get
+    commands.Bot = Bot
+    commands.has_role = lambda name: (lambda func: func)
+    ext.commands = commands
+    for attr, value in dict(Intents=Intents, ButtonStyle=ButtonStyle, File=File, NotFound=NotFound,
+                            HTTPException=HTTPException, Forbidden=Forbidden, errors=errors,
+                            ext=ext, ui=ui, utils=utils).items():
+        setattr(discord, attr, value)
+    sys.modules.update({'discord': discord, 'discord.errors': errors, 'discord.ext': ext,
+                        'discord.ext.commands': commands, 'discord.ui': ui, 'discord.utils': utils})
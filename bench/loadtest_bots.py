@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import tracemalloc
+import importlib.util
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BIN_DIR = os.path.join(BENCH_DIR, '..', 'bin')
+sys.path.insert(0, BIN_DIR)
+
+import fake_discord
+
+# Offline load test for btwscheme_app.py and btws_app.py. The bots run
+# against fake_discord instead of a gateway: thousands of simulated users go
+# through the invitation and RSVP dialogs at once while an organizer keeps
+# running the listing commands. Reports command and dialog-step latency
+# (p50/p99), event-loop lag, API calls and in-memory store heap per invite.
+
+ANSWERS = [
+    ('email', lambda n: f"user{n}@example.com"),
+    ('cell', lambda n: f"555-{n % 10000:04d}"),
+    ('color', lambda n: random.choice(['teal', 'magenta', 'ochre'])),
+    ('dietary', lambda n: random.choice(['none', 'vegan', 'no pork'])),
+    ('allergies', lambda n: random.choice(['none', 'peanuts'])),
+    ('arrival', lambda n: '2026-11-01'),
+    ('departure', lambda n: '2026-11-03'),
+]
+
+
+def load_bot(script):
+    spec = importlib.util.spec_from_file_location(script[:-3], os.path.join(BIN_DIR, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def describe(label, seconds):
+    return (f"{label:<32} n={len(seconds):<6} p50={percentile(seconds, 0.5) * 1000:8.2f}ms "
+            f"p99={percentile(seconds, 0.99) * 1000:8.2f}ms max={max(seconds, default=0) * 1000:8.2f}ms")
+
+
+class LoadTest:
+    def __init__(self, module, think_time):
+        self.bot = module.bot
+        self.module = module
+        self.think_time = think_time
+        self.guild = fake_discord.Guild(module.__dict__.get('GUILD_ID', 1))
+        self.bot.guilds[self.guild.id] = self.guild
+        self.organizer = fake_discord.User('organizer')
+        self.command_latency = {}
+        self.step_latency = []
+        self.loop_lag = []
+        self.timeouts = 0
+        self.rejected = 0  # answers the bot asked again for; every simulated answer is valid
+
+    def context(self, user, command, channel=None, attachments=()):
+        channel = channel or fake_discord.Channel(f"dm-{user.name}", self.guild)
+        return fake_discord.Context(self.bot, user, channel, self.guild, command, attachments)
+
+    async def invoke(self, ctx, command, *args, typed=False, **kwargs):
+        start = time.perf_counter()
+        await (self.bot.invoke_typed if typed else self.bot.invoke)(command, ctx, *args, **kwargs)
+        self.command_latency.setdefault(command, []).append(time.perf_counter() - start)
+
+    # Runs one dialog command, answering each prompt after some think time and
+    # timing how long the bot takes to come back after every answer.
+    async def dialog(self, user, number, command, *args):
+        ctx = self.context(user, command)
+        task = asyncio.ensure_future(self.invoke(ctx, command, *args, typed=True))
+        answered_at = None
+        while True:
+            reply = asyncio.ensure_future(ctx.replies.get())
+            done, _ = await asyncio.wait({task, reply}, return_when=asyncio.FIRST_COMPLETED)
+            if reply not in done:
+                reply.cancel()
+                break
+            message = reply.result()
+            if answered_at is not None:
+                self.step_latency.append(time.perf_counter() - answered_at)
+                answered_at = None
+            content = (message.content or '').lower()
+            if 'did not respond' in content:
+                self.timeouts += 1
+            if 'does not look like' in content or 'need to look like' in content or 'can not be before' in content:
+                self.rejected += 1
+            answer = next((make(number) for keyword, make in ANSWERS if keyword in content and 'enter' in content), None)
+            if answer is None:
+                continue
+            await asyncio.sleep(random.uniform(0, self.think_time))
+            answered_at = time.perf_counter()
+            self.bot.dispatch('message', fake_discord.Message(answer, user, ctx.channel, self.guild))
+        await task
+
+    async def sample_loop_lag(self, interval=0.01):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.append(time.perf_counter() - start - interval)
+
+    async def organizer_listings(self, commands, stop):
+        while not stop.is_set():
+            for command, args in commands:
+                await self.invoke(self.context(self.organizer, command), command, *args)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=0.25)
+            except asyncio.TimeoutError:
+                pass
+
+    async def concurrently(self, coros, listings):
+        stop = asyncio.Event()
+        organizer = asyncio.ensure_future(self.organizer_listings(listings, stop))
+        await asyncio.gather(*coros)
+        stop.set()
+        await organizer
+
+
+async def run_scheme_bot(test, users):
+    scheme = 'loadtest'
+    await test.invoke(test.context(test.organizer, 'create_scheme'), 'create_scheme', scheme,
+                      description='Synthetic load test scheme')
+    listings = [('list_schemes', ()), ('scheme_stats', (scheme,)), ('list_schemes_admin', ())]
+    await test.concurrently([test.dialog(user, n, 'request_scheme_invitation', scheme)
+                             for n, user in enumerate(users)], listings)
+    await test.invoke(test.context(test.organizer, 'bulk_status'), 'bulk_status', scheme, 'Pending', 'Invited')
+    await test.concurrently([test.dialog(user, n, 'submit_rsvp', scheme)
+                             for n, user in enumerate(users)], listings)
+    # The DM queue is rate limited like the real bot, so it is still draining here
+    print(f"bulk_status DMs still queued: {test.module.dm_queue.pending()}")
+    from scheme_store import verify_status_counts
+    mismatches = verify_status_counts(test.module.store)
+    print(f"status counters vs full recount: {'OK' if not mismatches else mismatches}")
+    # A dialog that took the command message itself as its first answer
+    swallowed = sum(1 for user in users if (test.module.store.get_invite(scheme, user.id) or {}).get('diet', '').startswith('!'))
+    print(f"RSVPs whose first answer was the command message: {swallowed} (should be 0)")
+
+
+async def run_btws_bot(test, users):
+    event = 'loadtest'
+    await test.invoke(test.context(test.organizer, 'create_event'), 'create_event', event,
+                      description='Synthetic load test event')
+    listings = [('list_events', ()), ('list_event_invites', ())]
+    await test.concurrently([test.dialog(user, n, 'request_invitation', event)
+                             for n, user in enumerate(users)], listings)
+    for user in users:
+        await test.invoke(test.context(test.organizer, 'alter_invitation_status'), 'alter_invitation_status',
+                          event, user.id, 'Invited')
+
+
+# Python heap per invite in a fresh in-memory store. Never touches the -s
+# store, and tracemalloc could not see SQLite's C heap anyway.
+def store_memory_per_invite(invites):
+    from scheme_store import MemorySchemeStore
+    tracemalloc.start()
+    store = MemorySchemeStore()
+    store.create_scheme('memory', 'Memory probe')
+    before = tracemalloc.get_traced_memory()[0]
+    now = datetime.now()
+    for user_id in range(invites):
+        store.add_invite('memory', user_id, {
+            'user_name': f"user{user_id}", 'email': f"user{user_id}@example.com", 'cell': '555-0100',
+            'color': 'teal', 'status': 'Pending', 'submit_date': now, 'last_modified': now,
+        })
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    store.close()
+    return used / invites
+
+
+async def main(args):
+    fake_discord.install()
+    fake_discord.api_latency = args.api_latency / 1000
+    workdir = tempfile.mkdtemp(prefix='btws_loadtest_')
+    os.makedirs(os.path.join(workdir, 'logs'))
+    os.chdir(workdir)  # the bots write logs/ and their default store relative to the cwd
+    os.environ['BTWS_STORE'] = args.store
+    module = load_bot('btwscheme_app.py' if args.bot == 'scheme' else 'btws_app.py')
+    logging.getLogger().setLevel(logging.WARNING)
+
+    test = LoadTest(module, args.think_time / 1000)
+    users = [fake_discord.User(f"user{n}") for n in range(args.users)]
+    for user in users:
+        test.bot.users[user.id] = user
+    sampler = asyncio.ensure_future(test.sample_loop_lag())
+    start = time.perf_counter()
+    if args.bot == 'scheme':
+        await run_scheme_bot(test, users)
+    else:
+        await run_btws_bot(test, users)
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+
+    print(f"{args.bot} bot, {args.users} users, {args.api_latency}ms simulated API latency, "
+          f"store {args.store if args.bot == 'scheme' else 'events dict'}: {elapsed:.1f}s")
+    for command, seconds in sorted(test.command_latency.items()):
+        print(describe(command, seconds))
+    print(describe('dialog step (answer -> reply)', test.step_latency))
+    print(describe('event loop lag', test.loop_lag))
+    stats = fake_discord.stats
+    print(f"messages dispatched: {stats.messages_dispatched}, wait_for predicate checks: {stats.predicate_checks} "
+          f"({stats.predicate_checks / max(stats.messages_dispatched, 1):.1f} per message), dialog timeouts: {test.timeouts}, "
+          f"answers rejected: {test.rejected} (should be 0)")
+    print(f"API calls: {', '.join(f'{kind}={count}' for kind, count in sorted(stats.api_calls.items()))}")
+    if hasattr(module, 'perf'):
+        print("!perf would say:")
+        print(module.perf.render_text())
+    if args.bot == 'scheme':
+        print(f"in-memory store (memory://) Python heap per invite: {store_memory_per_invite(args.users):,.0f} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the scheme bots against a fake Discord.")
+    parser.add_argument("-b", "--bot", choices=['scheme', 'btws'], default='scheme', help="Which bot to drive (default scheme)")
+    parser.add_argument("-u", "--users", type=int, default=2000, help="Number of simulated users (default 2000)")
+    parser.add_argument("-l", "--api-latency", type=float, default=20, help="Simulated Discord API round trip in ms (default 20)")
+    parser.add_argument("-t", "--think-time", type=float, default=500, help="Max simulated user think time per answer in ms (default 500)")
+    parser.add_argument("-s", "--store", default='memory://', help="BTWS_STORE for the scheme bot (default memory://)")
+    asyncio.run(main(parser.parse_args()))
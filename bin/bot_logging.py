@@ -0,0 +1,69 @@
+import atexit
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Per-command records (command, guild, user, duration) are logged here by
+# BotPerf and also written as JSON lines to their own file
+COMMAND_LOGGER = 'btws.commands'
+
+# Attributes every LogRecord has; anything else on a record came in via extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+# Hands records to a bounded queue without ever blocking the caller. When
+# the writer thread falls behind (a slow disk) and the queue is full, the
+# record is dropped and counted instead of stalling the event loop.
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.dropped_by_level = {}  # level name -> count
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self.dropped_by_level[record.levelname] = self.dropped_by_level.get(record.levelname, 0) + 1
+
+
+# One JSON object per line: time, level, logger, message and any extra= fields
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {'time': self.formatTime(record), 'level': record.levelname,
+                 'logger': record.name, 'message': record.getMessage()}
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# Sends everything logged to the root logger through a bounded queue to a
+# background thread, which does the console and file writes (and rotation).
+# Returns the queue handler, whose `dropped` counts records lost to a full queue.
+def start_logging(log_filename, level=logging.INFO, queue_size=10000):
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    c_handler = logging.StreamHandler()
+    c_handler.setLevel(level)
+    c_handler.setFormatter(formatter)
+    f_handler = RotatingFileHandler(log_filename, maxBytes=10485760, backupCount=5)
+    f_handler.setLevel(level)
+    f_handler.setFormatter(formatter)
+    j_handler = RotatingFileHandler(log_filename.rsplit('.', 1)[0] + '_commands.jsonl', maxBytes=10485760, backupCount=5)
+    j_handler.setLevel(level)
+    j_handler.setFormatter(JsonFormatter())
+    j_handler.addFilter(logging.Filter(COMMAND_LOGGER))
+
+    q_handler = DroppingQueueHandler(queue.Queue(queue_size))
+    listener = QueueListener(q_handler.queue, c_handler, f_handler, j_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # flushes what is still queued on exit
+
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    logger.addHandler(q_handler)
+    return q_handler
@@ -0,0 +1,238 @@
+import asyncio
+import contextvars
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+# One record per command run, with command, guild, user, duration and whether it failed
+command_logger = logging.getLogger('btws.commands')
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+# The command being handled in the current task; API calls made from tasks
+# outside any command (the DM queue, timers) are counted as 'background'
+current_command = contextvars.ContextVar('current_command', default='background')
+
+
+class Histogram:
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.bounds) and value > self.bounds[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    # Upper bound of the bucket holding the given quantile
+    def quantile(self, fraction):
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            seen += count
+            if seen >= target and count:
+                return bound
+        return 0.0
+
+
+# Counts the time discord.py reports waiting on Discord rate limits
+class _RateLimitHandler(logging.Handler):
+    def __init__(self, perf):
+        super().__init__(logging.DEBUG)
+        self._perf = perf
+
+    def emit(self, record):
+        message = record.getMessage()
+        if 'rate limit' not in message.lower():
+            return
+        seconds = re.findall(r'(\d+(?:\.\d+)?) seconds', message)
+        if seconds:
+            self._perf.rate_limit_wait += float(seconds[-1])
+        self._perf.rate_limit_hits += 1
+
+
+# Hot-path numbers for a bot: per-command latency histograms, Discord API
+# calls per command, rate-limit waits, event-loop lag and open dialogs
+# (wait_for calls, plus whatever the dialog engine counts). Everything is plain counters updated in O(1) per event.
+class BotPerf:
+    def __init__(self, bot, lag_interval=0.5):
+        self._bot = bot
+        self._lag_interval = lag_interval
+        self._lag_task = None
+        self._extra_sources = {}
+        self.started = time.time()
+        self.commands = {}        # command -> Histogram
+        self.errors = {}          # command -> count
+        self.api_calls = {}       # (command, kind) -> count
+        self.loop_lag = Histogram([0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5])
+        self.max_loop_lag = 0.0
+        self.open_dialogs = 0
+        self.rate_limit_wait = 0.0
+        self.rate_limit_hits = 0
+
+    def install(self):
+        self._bot.before_invoke(self._before_invoke)
+        self._bot.after_invoke(self._after_invoke)
+        self._wrap_wait_for()
+        self._wrap_http()
+        logging.getLogger('discord.http').addHandler(_RateLimitHandler(self))
+        return self
+
+    # Extra gauges read at render time, e.g. the DM queue backlog
+    def add_gauge(self, name, read):
+        self._extra_sources[name] = read
+
+    def count_api_call(self, kind):
+        key = (current_command.get(), kind)
+        self.api_calls[key] = self.api_calls.get(key, 0) + 1
+
+    async def _before_invoke(self, ctx):
+        ctx.perf_started = time.perf_counter()
+        ctx.perf_token = current_command.set(ctx.command.name)
+        self.start()
+
+    async def _after_invoke(self, ctx):
+        elapsed = time.perf_counter() - ctx.perf_started
+        name = ctx.command.name
+        self.commands.setdefault(name, Histogram()).observe(elapsed)
+        if getattr(ctx, 'command_failed', False):
+            self.errors[name] = self.errors.get(name, 0) + 1
+        ctx.perf_duration = elapsed
+        guild = getattr(ctx, 'guild', None)
+        author = getattr(ctx, 'author', None)
+        command_logger.info(f"{name} took {elapsed * 1000:.1f}ms", extra={
+            'command': name, 'guild': guild.id if guild else None, 'user': author.id if author else None,
+            'duration_ms': round(elapsed * 1000, 3), 'failed': bool(getattr(ctx, 'command_failed', False))})
+        try:
+            current_command.reset(ctx.perf_token)
+        except ValueError:
+            pass  # hooks ran in different contexts; the command's context is gone anyway
+
+    def _wrap_wait_for(self):
+        wait_for = self._bot.wait_for
+
+        async def counted_wait_for(*args, **kwargs):
+            self.open_dialogs += 1
+            try:
+                return await wait_for(*args, **kwargs)
+            finally:
+                self.open_dialogs -= 1
+        self._bot.wait_for = counted_wait_for
+
+    # Every REST call discord.py makes goes through HTTPClient.request
+    def _wrap_http(self):
+        http = getattr(self._bot, 'http', None)
+        if http is None:
+            return
+        request = http.request
+
+        async def counted_request(route, *args, **kwargs):
+            self.count_api_call(_route_kind(route))
+            return await request(route, *args, **kwargs)
+        http.request = counted_request
+
+    # Starts the lag sampler once the loop is running
+    def start(self):
+        if self._lag_task is None:
+            self._lag_task = asyncio.ensure_future(self._sample_loop_lag())
+
+    async def _sample_loop_lag(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self._lag_interval)
+            lag = time.perf_counter() - started - self._lag_interval
+            self.loop_lag.observe(lag)
+            self.max_loop_lag = max(self.max_loop_lag, lag)
+
+    def _api_calls_by_command(self):
+        totals = {}
+        for (command, kind), count in self.api_calls.items():
+            totals.setdefault(command, {})[kind] = count
+        return totals
+
+    # Short summary for the !perf command, busiest commands first
+    def render_text(self, limit=15):
+        api_calls = self._api_calls_by_command()
+        lines = [f"Up {time.time() - self.started:.0f}s, open dialogs {self.open_dialogs}, "
+                 f"loop lag p99 <= {self.loop_lag.quantile(0.99) * 1000:.0f}ms (max {self.max_loop_lag * 1000:.0f}ms), "
+                 f"rate limited {self.rate_limit_hits}x for {self.rate_limit_wait:.1f}s"]
+        for name, read in self._extra_sources.items():
+            lines.append(f"{name}: {read()}")
+        busiest = sorted(self.commands.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+        for name, histogram in busiest:
+            calls = ', '.join(f"{kind} {count}" for kind, count in sorted(api_calls.get(name, {}).items()))
+            lines.append(f"`{name}`: {histogram.count} runs, avg {histogram.total / histogram.count * 1000:.0f}ms, "
+                         f"p50 <= {histogram.quantile(0.5) * 1000:.0f}ms, p99 <= {histogram.quantile(0.99) * 1000:.0f}ms, "
+                         f"errors {self.errors.get(name, 0)}" + (f", API: {calls}" if calls else ""))
+        if 'background' in api_calls:
+            lines.append("background API: " + ', '.join(f"{kind} {count}" for kind, count in sorted(api_calls['background'].items())))
+        return '\n'.join(lines)
+
+    # Prometheus text exposition format
+    def render_prometheus(self):
+        lines = ["# TYPE btws_command_seconds histogram"]
+        for name, histogram in sorted(self.commands.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds + ['+Inf'], histogram.counts):
+                cumulative += count
+                lines.append(f'btws_command_seconds_bucket{{command="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'btws_command_seconds_sum{{command="{name}"}} {histogram.total}')
+            lines.append(f'btws_command_seconds_count{{command="{name}"}} {histogram.count}')
+        lines.append("# TYPE btws_command_errors_total counter")
+        for name, count in sorted(self.errors.items()):
+            lines.append(f'btws_command_errors_total{{command="{name}"}} {count}')
+        lines.append("# TYPE btws_api_calls_total counter")
+        for (command, kind), count in sorted(self.api_calls.items()):
+            lines.append(f'btws_api_calls_total{{command="{command}",kind="{kind}"}} {count}')
+        lines += ["# TYPE btws_loop_lag_seconds histogram"]
+        cumulative = 0
+        for bound, count in zip(self.loop_lag.bounds + ['+Inf'], self.loop_lag.counts):
+            cumulative += count
+            lines.append(f'btws_loop_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"btws_loop_lag_seconds_sum {self.loop_lag.total}")
+        lines.append(f"btws_loop_lag_seconds_count {self.loop_lag.count}")
+        lines += ["# TYPE btws_open_dialogs gauge", f"btws_open_dialogs {self.open_dialogs}",
+                  "# TYPE btws_rate_limit_wait_seconds_total counter", f"btws_rate_limit_wait_seconds_total {self.rate_limit_wait}"]
+        for name, read in self._extra_sources.items():
+            lines += [f"# TYPE btws_{name} gauge", f"btws_{name} {read()}"]
+        return '\n'.join(lines) + '\n'
+
+    # Serves render_prometheus() on http://host:port/metrics
+    async def serve_metrics(self, host='127.0.0.1', port=9108):
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b'\r\n\r\n')
+                body = self.render_prometheus().encode('utf-8')
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+                await writer.drain()
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+        server = await asyncio.start_server(handle, host, port)
+        logger.info(f"Serving bot metrics on http://{host}:{port}/metrics")
+        return server
+
+
+def _route_kind(route):
+    method = getattr(route, 'method', '?')
+    path = getattr(route, 'path', '')
+    if path == '/users/@me/channels':
+        return 'open_dm'
+    if path.endswith('/messages') and method == 'POST':
+        return 'send'
+    if path.startswith('/users/{user_id}') and method == 'GET':
+        return 'fetch_user'
+    if '/messages/' in path and method == 'PATCH':
+        return 'edit'
+    if path.startswith('/interactions/'):
+        return 'interaction'
+    return f"{method} {path}"
@@ -0,0 +1,130 @@
+import asyncio
+import tempfile
+
+import discord
+
+# Discord refuses messages longer than this
+MESSAGE_LIMIT = 2000
+# Room kept free on paginated messages for the page footer
+FOOTER_ROOM = 40
+
+
+async def _aiter(rows):
+    if hasattr(rows, '__aiter__'):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+# A single row longer than the limit is cut on newlines where possible
+def _split_row(row, limit):
+    while len(row) > limit:
+        cut = row.rfind('\n', 0, limit)
+        cut = cut + 1 if cut > 0 else limit
+        yield row[:cut]
+        row = row[cut:]
+    if row:
+        yield row
+
+
+# Packs rows (each normally ending in a newline) into as few messages as fit
+# the limit. Rows are pulled one at a time, so only the page being filled is
+# ever held in memory.
+async def iter_pages(rows, limit=MESSAGE_LIMIT):
+    page = []
+    size = 0
+    async for row in _aiter(rows):
+        for piece in _split_row(row, limit):
+            if page and size + len(piece) > limit:
+                yield ''.join(page)
+                page = []
+                size = 0
+            page.append(piece)
+            size += len(piece)
+    if page:
+        yield ''.join(page)
+
+
+# Sends every page, one message each
+async def send_rows(ctx, rows, empty="Nothing to show."):
+    sent = False
+    async for page in iter_pages(rows):
+        await ctx.send(page)
+        sent = True
+    if not sent:
+        await ctx.send(empty)
+
+
+# Writes the rows to a temp file as they come and sends it as one attachment
+async def send_rows_as_file(ctx, rows, filename, empty="Nothing to show."):
+    with tempfile.TemporaryFile(mode='w+b') as out:
+        async for row in _aiter(rows):
+            out.write(row.encode('utf-8'))
+        if not out.tell():
+            await ctx.send(empty)
+            return
+        out.seek(0)
+        await ctx.send(file=discord.File(out, filename=filename))
+
+
+# Prev/Next buttons over a page iterator. A page is only rendered the first
+# time someone moves onto it; pages already seen are kept for going back.
+class PageView(discord.ui.View):
+    def __init__(self, author, pages, rendered, timeout=300):
+        super().__init__(timeout=timeout)
+        self.message = None
+        self._author = author
+        self._pages = pages
+        self._rendered = rendered
+        self._index = 0
+        self._exhausted = False
+        # Two quick Next clicks must not pull from the page iterator at once
+        self._fetching = asyncio.Lock()
+
+    def render(self):
+        total = f" of {len(self._rendered)}" if self._exhausted else ""
+        return f"{self._rendered[self._index]}\n-# Page {self._index + 1}{total}"
+
+    async def interaction_check(self, interaction):
+        return interaction.user.id == self._author.id
+
+    async def on_timeout(self):
+        if self.message is not None:
+            await self.message.edit(view=None)
+
+    @discord.ui.button(label="Prev", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction, button):
+        if self._index > 0:
+            self._index -= 1
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction, button):
+        async with self._fetching:
+            if self._index + 1 == len(self._rendered) and not self._exhausted:
+                page = await anext(self._pages, None)
+                if page is None:
+                    self._exhausted = True
+                else:
+                    self._rendered.append(page)
+            if self._index + 1 < len(self._rendered):
+                self._index += 1
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+
+# Sends the first page with Prev/Next buttons, or a plain message when
+# everything fits on one page.
+async def send_paginated(ctx, rows, empty="Nothing to show."):
+    pages = iter_pages(rows, MESSAGE_LIMIT - FOOTER_ROOM)
+    first = await anext(pages, None)
+    if first is None:
+        await ctx.send(empty)
+        return
+    second = await anext(pages, None)
+    if second is None:
+        await ctx.send(first)
+        return
+    view = PageView(ctx.author, pages, [first, second])
+    view.message = await ctx.send(view.render(), view=view)
@@ -1,30 +1,24 @@
 import os
 import sys
+import asyncio
 
 # Set up logging
 import logging
-from logging.handlers import RotatingFileHandler
+from bot_logging import start_logging
 from datetime import datetime, timedelta
 
 def get_clean_timestamp():
     # Format: Year-Month-Day_Hour-Minute-Second
     return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
+# Console and file writes happen on a background thread fed by a bounded
+# queue, so a slow disk never stalls the event loop; per-command JSON
+# records go to logs/btw_schemes_<time>_commands.jsonl
 def setup_logging():
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
     log_filename = f"logs/btw_schemes_{get_clean_timestamp()}.log"
-    c_handler = logging.StreamHandler()
-    c_handler.setLevel(logging.INFO)
-    f_handler = RotatingFileHandler(log_filename, maxBytes=10485760, backupCount=5)
-    f_handler.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    c_handler.setFormatter(formatter)
-    f_handler.setFormatter(formatter)
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
-
-setup_logging()
+    return start_logging(log_filename, logging.INFO)
+
+log_handler = setup_logging()
 
 from IPython import embed
 import nest_asyncio
@@ -33,6 +27,9 @@ nest_asyncio.apply()
 import discord
 from discord.ext import commands
 
+from bot_perf import BotPerf
+from dialogs import DialogEngine, valid_email, valid_cell
+
 intents = discord.Intents.default()
 intents.messages = True
 intents.message_content = True
@@ -41,16 +38,28 @@ intents.members = True
 bot = commands.Bot(command_prefix='!', intents=intents)
 events = {}
 
+perf = BotPerf(bot).install()
+perf.add_gauge('log_records_dropped', lambda: log_handler.dropped)
+dialogs = DialogEngine(bot, perf).install()
+# Prometheus text on http://127.0.0.1:<port>/metrics; 0 turns it off
+METRICS_PORT = int(os.environ.get('BTWS_METRICS_PORT', '9109'))
+metrics_server = None
+
 @bot.event
 async def on_ready():
+    global metrics_server
     print(f'Logged in as {bot.user.name}')
+    perf.start()
+    if METRICS_PORT and metrics_server is None:
+        metrics_server = await perf.serve_metrics(port=METRICS_PORT)
 
 @bot.command()
 async def create_event(ctx, event_id: str, *, description: str):
     if event_id in events:
         await ctx.send(f"Event ID `{event_id}` already exists.")
     else:
-        events[event_id] = {'description': description, 'requests': []}
+        events[event_id] = {'description': description, 'requests': [],
+                            'status_counts': {status: 0 for status in ['Pending', 'Invited', 'Attending', 'Waitlist', 'Revoked']}}
         await ctx.send(f"Event `{event_id}` created successfully!")
 
 @bot.command(name="list_invite_reqs")
@@ -64,6 +73,13 @@ async def list_invite_reqs(ctx):
     else:
         await ctx.send("No events have been created yet.")
 
+# Dialog steps: (answer key, prompt, check); a failed check asks the same step again
+INVITE_STEPS = [
+    ('email', "Please enter your contact email:", valid_email),
+    ('cell', "Please enter your contact cell number:", valid_cell),
+    ('color', "Please enter your favorite color:", None),
+]
+
 @bot.command(name="request_invitation")
 async def request_invitation(ctx, event_id: str):
     if event_id not in events:
@@ -71,35 +87,24 @@ async def request_invitation(ctx, event_id: str):
         return
 
     # Ask for additional info
-    def check(m):
-        return m.author == ctx.author and m.channel == ctx.channel
-
     try:
-        await ctx.send("Please enter your contact email:")
-        email_msg = await bot.wait_for('message', timeout=60.0, check=check)
-        email = email_msg.content
-
-        await ctx.send("Please enter your contact cell number:")
-        cell_msg = await bot.wait_for('message', timeout=60.0, check=check)
-        cell = cell_msg.content
-
-        await ctx.send("Please enter your favorite color:")
-        color_msg = await bot.wait_for('message', timeout=60.0, check=check)
-        color = color_msg.content
-
+        answers = await dialogs.ask(ctx, INVITE_STEPS, timeout=60.0)
     except asyncio.TimeoutError:
         await ctx.send("You did not respond in time!")
         return
+    if answers is None:
+        return
 
     # Save the request
     request = {
         'user': ctx.author,
-        'email': email,
-        'cell': cell,
-        'color': color,
+        'email': answers['email'],
+        'cell': answers['cell'],
+        'color': answers['color'],
         'status': 'Pending'
     }
     events[event_id]['requests'].append(request)
+    events[event_id]['status_counts']['Pending'] += 1
     await ctx.send(f"Your invitation request has been submitted for event `{event_id}`.")
 
 
@@ -116,6 +121,9 @@ async def alter_invitation_status(ctx, event_id: str, user_id: int, new_status:
         if request['user'].id == user_id:
             old_status = request['status']
             request['status'] = new_status
+            status_count = events[event_id]['status_counts']
+            status_count[old_status] -= 1
+            status_count[new_status] += 1
             user = request['user']
             try:
                 await user.send(f"Your invitation status for the event `{event_id}` - `{events[event_id]['description']}` has been changed from `{old_status}` to `{new_status}`.")
@@ -131,10 +139,7 @@ async def alter_invitation_status(ctx, event_id: str, user_id: int, new_status:
 async def list_events(ctx):
     if events:
         for event_id, info in events.items():
-            status_count = {status: 0 for status in ['Pending', 'Invited', 'Attending', 'Waitlist', 'Revoked']}
-            for request in info['requests']:
-                if request['status'] in status_count:
-                    status_count[request['status']] += 1
+            status_count = info['status_counts']
             status_details = ', '.join([f"{status}: {count}" for status, count in status_count.items()])
             await ctx.send(f"**{event_id}** - {info['description']} - {status_details}")
     else:
@@ -157,5 +162,12 @@ async def list_event_invites(ctx):
         await ctx.send(response)
 
 
+@bot.command(name="perf")
+async def perf_stats(ctx):
+    await ctx.send(perf.render_text()[:2000])
+
+
 # Replace 'your_bot_token' with your actual Discord bot token
-bot.run(sys.argv[1])
+if __name__ == "__main__":
+    # log_handler=None: discord.py logs through the root queue handler, not its own console handler
+    bot.run(sys.argv[1], log_handler=None)
@@ -1,32 +1,27 @@
 import os
 import sys
+import asyncio
+import tempfile
 
 GUILD_ID = 1187265836856115221 ## Server ID, put on comand line
 
 # Set up logging
 import logging
-from logging.handlers import RotatingFileHandler
+from bot_logging import start_logging
 from datetime import datetime, timedelta
 
 def get_clean_timestamp():
     # Format: Year-Month-Day_Hour-Minute-Second
     return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
+# Console and file writes happen on a background thread fed by a bounded
+# queue, so a slow disk never stalls the event loop; per-command JSON
+# records go to logs/btw_schemes_<time>_commands.jsonl
 def setup_logging():
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
     log_filename = f"logs/btw_schemes_{get_clean_timestamp()}.log"
-    c_handler = logging.StreamHandler()
-    c_handler.setLevel(logging.INFO)
-    f_handler = RotatingFileHandler(log_filename, maxBytes=10485760, backupCount=5)
-    f_handler.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    c_handler.setFormatter(formatter)
-    f_handler.setFormatter(formatter)
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
-
-setup_logging()
+    return start_logging(log_filename, logging.INFO)
+
+log_handler = setup_logging()
 
 from IPython import embed
 import nest_asyncio
@@ -35,162 +30,213 @@ nest_asyncio.apply()
 import discord
 from discord.ext import commands
 
+from scheme_store import open_store, SCHEME_STATUSES, INVITE_STATUSES
+from user_cache import UserCache
+from bot_responses import send_rows, send_rows_as_file, send_paginated
+from scheme_io import write_invites, read_status_changes, EXPORT_FORMATS
+from dm_queue import DMQueue, start_progress_report
+from bot_perf import BotPerf
+from dialogs import DialogEngine, valid_email, valid_cell, valid_date, valid_departure
+
 intents = discord.Intents.default()
 intents.messages = True
 intents.message_content = True
 intents.members = True
 
 bot = commands.Bot(command_prefix='!', intents=intents)
-schemes = {}
+
+# 'memory://' for a throwaway store, 'sqlite:///path' for one that survives restarts,
+# 'journal:///dir' for the memory store backed by a write-behind journal and snapshots
+STORE_URL = os.environ.get('BTWS_STORE', 'sqlite:///btw_schemes.sqlite3')
+store = open_store(STORE_URL)
+user_cache = UserCache(bot)
+dm_queue = DMQueue(user_cache)
+
+perf = BotPerf(bot).install()
+perf.add_gauge('log_records_dropped', lambda: log_handler.dropped)
+dialogs = DialogEngine(bot, perf).install()
+perf.add_gauge('dm_queue_pending', dm_queue.pending)
+perf.add_gauge('dm_queue_rate_limit_wait_seconds', lambda: round(dm_queue.rate_limit_wait, 3))
+# Prometheus text on http://127.0.0.1:<port>/metrics; 0 turns it off
+METRICS_PORT = int(os.environ.get('BTWS_METRICS_PORT', '9108'))
+metrics_server = None
 
 @bot.event
 async def on_ready():
+    global metrics_server
     print(f'Logged in as {bot.user.name}')
+    perf.start()
+    if METRICS_PORT and metrics_server is None:
+        metrics_server = await perf.serve_metrics(port=METRICS_PORT)
+
 
+def invite_req_rows():
+    for info in store.schemes():
+        yield f"**{info['name']}** - {info['description']}\n"
+        for batch in store.scheme_invite_batches(info['name']):
+            for request in batch:
+                user_name = request.get('user_name') or request['user_id']
+                yield f"    - {user_name}: Email {request['email']}, Cell {request['cell']}, Color {request['color']}, Status: {request['status']}\n"
 
 @bot.command(name="list_invite_reqs")
 async def list_invite_reqs(ctx):
-    if schemes:
-        for scheme_id, info in schemes.items():
-            response = f"**{scheme_id}** - {info['description']}\n"
-            for request in info['invites']:
-                response += f"    - {request['user'].name}: Email {request['email']}, Cell {request['cell']}, Color {request['color']}, Status: {request['status']}\n"
-            await ctx.send(response)
-    else:
-        await ctx.send("No schemes have been created yet.")
+    await send_paginated(ctx, invite_req_rows(), empty="No schemes have been created yet.")
 
 
 # Command to create a scheme
 @bot.command()
 async def create_scheme(ctx, name, *, description):
-    if name in schemes:
+    if not store.create_scheme(name, description):
         await ctx.send("A scheme with that name already exists.")
         return
-    schemes[name] = {'description': description, 'status': 'announced', 'invites': {}}
     await ctx.send(f"Scheme '{name}' created with status 'announced'.")
 
 
+def scheme_rows():
+    for details in store.schemes():
+        status_counts = store.count_by_status(details['name'])
+        yield (f"**Name:** {details['name']}, **Status:** {details['status']}, **Description:** {details['description']}, "
+               f"**Invites:** Attending: {status_counts['Attending']}, Invited: {status_counts['Invited']}, "
+               f"Pending: {status_counts['Pending']}, Waitlisted: {status_counts['Waitlist']}, Revoked: {status_counts['Revoked']}\n")
+
 @bot.command()
 async def list_schemes(ctx):
-    response = ""
-    for name, details in schemes.items():
-        status_counts = {status: 0 for status in ['Attending', 'Invited', 'Pending', 'Waitlisted', 'Revoked']}
-        for invite in details['invites'].values():
-            if invite['status'] in status_counts:
-                status_counts[invite['status']] += 1
-        response += (f"**Name:** {name}, **Status:** {details['status']}, **Description:** {details['description']}, "
-                     f"**Invites:** Attending: {status_counts['Attending']}, Invited: {status_counts['Invited']}, "
-                     f"Pending: {status_counts['Pending']}, Waitlisted: {status_counts['Waitlisted']}, Revoked: {status_counts['Revoked']}\n")
-    if not response:
-        response = "No schemes have been created yet."
-    await ctx.send(response)    
+    await send_rows(ctx, scheme_rows(), empty="No schemes have been created yet.")
+
+# Command to show the invite counts of one scheme, read straight from its stored counters
+@bot.command()
+async def scheme_stats(ctx, name):
+    details = store.get_scheme(name)
+    if not details:
+        await ctx.send("Scheme not found.")
+        return
+    status_counts = store.count_by_status(name)
+    summary = ', '.join(f"{status}: {count}" for status, count in status_counts.items())
+    await ctx.send(f"**{name}** ({details['status']}) - {summary}, Total: {sum(status_counts.values())}")
 
 # Command to change a scheme's status
 @bot.command()
 @commands.has_role("scheme-organizer")
 async def alter_scheme_status(ctx, name, status):
-    if name not in schemes:
+    if not store.get_scheme(name):
         await ctx.send("Scheme not found.")
         return
-    if status not in ['announced', 'happening', 'past']:
+    if status not in SCHEME_STATUSES:
         await ctx.send("Invalid status. Valid statuses are 'announced', 'happening', or 'past'.")
         return
-    schemes[name]['status'] = status
+    store.set_scheme_status(name, status)
     await ctx.send(f"Scheme '{name}' status updated to {status}.")
 
 # Command to request an invitation to a scheme
+# Dialog steps: (answer key, prompt, check); a failed check asks the same step again
+INVITE_STEPS = [
+    ('email', "Please enter your contact email:", valid_email),
+    ('cell', "Please enter your contact cell number:", valid_cell),
+    ('color', "Please enter your favorite color:", None),
+]
+RSVP_STEPS = [
+    ('diet', "Please enter your dietary restrictions:", None),
+    ('allergies', "Please enter any allergies you have:", None),
+    ('arrival', "Please enter your date of arrival (YYYY-MM-DD):", valid_date),
+    ('departure', "Please enter your date of departure (YYYY-MM-DD):", valid_departure),
+]
+
 @bot.command()
 async def request_scheme_invitation(ctx, name):
     
-    if name not in schemes:
+    if not store.get_scheme(name):
         await ctx.send("Scheme not found.")
         return
     member = ctx.author
-    if member.id in schemes[name]['invites']:
+    if store.get_invite(name, member.id):
         await ctx.send("You have already requested an invite.")
         return
     
     # Ask for additional info
-    def check(m):
-        return m.author == ctx.author and m.channel == ctx.channel
-
     try:
-        await ctx.send("Please enter your contact email:")
-        email_msg = await bot.wait_for('message', timeout=60.0, check=check)
-        email = email_msg.content
-
-        await ctx.send("Please enter your contact cell number:")
-        cell_msg = await bot.wait_for('message', timeout=60.0, check=check)
-        cell = cell_msg.content
-
-        await ctx.send("Please enter your favorite color:")
-        color_msg = await bot.wait_for('message', timeout=60.0, check=check)
-        color = color_msg.content
-
+        answers = await dialogs.ask(ctx, INVITE_STEPS, timeout=60.0)
     except asyncio.TimeoutError:
         await ctx.send("You did not respond in time!")
         return
+    if answers is None:
+        return
 
     current_time = datetime.now()
 
     # Save the request
     request = {
-        'user': ctx.author,
-        'email': email,
-        'cell': cell,
-        'color': color,
+        'user_name': str(ctx.author),
+        'email': answers['email'],
+        'cell': answers['cell'],
+        'color': answers['color'],
         'status': 'Pending',
         'submit_date': current_time,
         'last_modified': current_time
     }
-    schemes[name]['invites'][member.id] = request
+    # A second dialog for the same scheme may have finished while this one was open
+    if not store.add_invite(name, member.id, request):
+        await ctx.send("You have already requested an invite.")
+        return
 
     await ctx.send(f"Your invitation request has been submitted for scheme `{name}`  and is pending..")
     
 @bot.command()
 async def my_schemes(ctx):
     member = ctx.author
-    response = ""
-    for name, details in schemes.items():
-        if member.id in details['invites']:
-            invite = details['invites'][member.id]
-            submit_date = invite['submit_date'].strftime("%Y-%m-%d %H:%M:%S")
-            last_modified = invite['last_modified'].strftime("%Y-%m-%d %H:%M:%S")
-            response += (f"**Scheme Name:** {name}, **Status:** {invite['status']}, "
-                         f"**Description:** {details['description']}, "
-                         f"**Submit Date:** {submit_date}, **Last Modified:** {last_modified}\n")
-    if not response:
-        response = "You are not part of any schemes."
-    await ctx.send(response)
-
-# Command for admins to list all schemes with detailed status summaries and invite details
+    rows = []
+    for invite in store.user_invites(member.id):
+        submit_date = invite['submit_date'].strftime("%Y-%m-%d %H:%M:%S")
+        last_modified = invite['last_modified'].strftime("%Y-%m-%d %H:%M:%S")
+        rows.append(f"**Scheme Name:** {invite['scheme']}, **Status:** {invite['status']}, "
+                    f"**Description:** {invite['scheme_description']}, "
+                    f"**Submit Date:** {submit_date}, **Last Modified:** {last_modified}\n")
+    await send_rows(ctx, rows, empty="You are not part of any schemes.")
+
+# Names are saved at submit time; only older invites need a lookup, resolved a batch at a time
+async def fill_user_names(name, invites, guild):
+    missing = [invite['user_id'] for invite in invites if not invite.get('user_name')]
+    if not missing:
+        return
+    users = await user_cache.get_many(missing, guild=guild)
+    for invite in invites:
+        user = users.get(invite['user_id'])
+        if not invite.get('user_name') and user is not None:
+            invite['user_name'] = str(user)
+            store.update_invite(name, invite['user_id'], user_name=invite['user_name'])
+
+async def scheme_admin_rows(guild):
+    for details in store.schemes():
+        name = details['name']
+        yield (f"**Scheme Name:** {name}\n"
+               f"**Status:** {details['status']}\n"
+               f"**Description:** {details['description']}\n"
+               f"**Invitations:**\n")
+        any_invites = False
+        for invites in store.scheme_invite_batches(name):
+            await fill_user_names(name, invites, guild)
+            # Detailed invite information
+            for invite in invites:
+                any_invites = True
+                yield (f"    - {invite.get('user_name') or 'Unknown user'} (ID: {invite['user_id']})\n"
+                       f"      Email: {invite.get('email', 'Not provided')}\n"
+                       f"      Cell: {invite.get('cell', 'Not provided')}\n"
+                       f"      Color: {invite.get('color', 'Not specified')}\n"
+                       f"      Status: {invite['status']}\n"
+                       f"      Submitted: {invite.get('submit_date', 'Not available')}\n"
+                       f"      Last Modified: {invite.get('last_modified', 'Not available')}\n")
+        if not any_invites:
+            yield "    No invites issued yet.\n"
+
+# Command for admins to list all schemes with detailed status summaries and invite details,
+# as Prev/Next pages or, with 'file', as one text attachment
 @bot.command()
 @commands.has_role("scheme-organizer")
-async def list_schemes_admin(ctx):
-    response = ""
-    for name, details in schemes.items():
-        response += (f"**Scheme Name:** {name}\n"
-                     f"**Status:** {details['status']}\n"
-                     f"**Description:** {details['description']}\n"
-                     f"**Invitations:**\n")
-        if not details['invites']:
-            response += "    No invites issued yet.\n"
-        else:
-            # Detailed invite information
-            for user_id, invite in details['invites'].items():
-                user = await bot.fetch_user(user_id)  # Fetch user information
-                user_details = (f"    - {user.name}#{user.discriminator} (ID: {user_id})\n"
-                                f"      Email: {invite.get('email', 'Not provided')}\n"
-                                f"      Cell: {invite.get('cell', 'Not provided')}\n"
-                                f"      Color: {invite.get('color', 'Not specified')}\n"
-                                f"      Status: {invite['status']}\n"
-                                f"      Submitted: {invite.get('submit_date', 'Not available')}\n"
-                                f"      Last Modified: {invite.get('last_modified', 'Not available')}\n")
-                response += user_details
-
-    if not response:
-        response = "No schemes have been created yet."
-    await ctx.send(response)
+async def list_schemes_admin(ctx, output="pages"):
+    rows = scheme_admin_rows(ctx.guild)
+    if output == "file":
+        await send_rows_as_file(ctx, rows, "schemes_admin.txt", empty="No schemes have been created yet.")
+    else:
+        await send_paginated(ctx, rows, empty="No schemes have been created yet.")
     
     
 # Command for users to alter their own invitation status
@@ -209,22 +255,21 @@ async def alter_my_scheme_invitation_status(ctx, name, new_status):
     
        # Now, perform the rest of your command's functionality
     # Example: changing an invite status and notifying the user
-    if name not in schemes:
+    if not store.get_scheme(name):
         await ctx.send("Scheme not found.")
         return
-    if ctx.author.id not in schemes[name]['invites']:
+    invite = store.get_invite(name, ctx.author.id)
+    if not invite:
         await ctx.send("You do not have an invitation to this scheme.")
         return
     
-    current_status = schemes[name]['invites'][ctx.author.id]['status']
+    current_status = invite['status']
     
     if new_status == "Revoked":
-        schemes[name]['invites'][ctx.author.id]['status'] = 'Revoked'
-        schemes[name]['invites'][ctx.author.id]['last_modified'] = datetime.now()
+        store.update_invite(name, ctx.author.id, status='Revoked', last_modified=datetime.now())
         await ctx.send("Your invitation has been revoked.")
     elif new_status == "Resubmit" and current_status == "Revoked":
-        schemes[name]['invites'][ctx.author.id]['status'] = 'Pending'
-        schemes[name]['invites'][ctx.author.id]['last_modified'] = datetime.now()
+        store.update_invite(name, ctx.author.id, status='Pending', last_modified=datetime.now())
         await ctx.send("Your invitation has been resubmitted and is now pending.")
     else:
         await ctx.send("Invalid request. You can only resubmit a revoked invitation.")
@@ -242,64 +287,144 @@ async def alter_my_scheme_invitation_status(ctx, name, new_status):
 @bot.command()
 @commands.has_role("scheme-organizer")
 async def alter_scheme_invitation_status(ctx, name, user_id: int, status):
-    if name not in schemes or user_id not in schemes[name]['invites']:
+    if not store.get_invite(name, user_id):
         await ctx.send("Scheme or user not found in the specified scheme.")
         return
-    if status not in ['Pending', 'Invited', 'Attending', 'Waitlist', 'Revoked']:
+    if status not in INVITE_STATUSES:
         await ctx.send("Invalid status.")
         return
-    schemes[name]['invites'][user_id]['status'] = status
-    user = await bot.fetch_user(user_id)
-    await user.send(f"Your invitation status for '{name}' has been changed to {status}.")
+    store.update_invite(name, user_id, status=status, last_modified=datetime.now())
+    user = await user_cache.get(user_id, guild=ctx.guild)
+    if user is None:
+        await ctx.send(f"Invitation status updated for {user_id} for {name} to {status}, but that user could not be found to notify.")
+        return
+    try:
+        await user.send(f"Your invitation status for '{name}' has been changed to {status}.")
+    except discord.errors.Forbidden:
+        await ctx.send(f"Invitation status updated for {user} for {name} to {status}, but they have DMs disabled.")
+        return
     await ctx.send(f"Invitation status updated successfully for {user} for {name} to {status}.")
 
+# Command to download a scheme's invites as a CSV or JSONL attachment
+@bot.command()
+@commands.has_role("scheme-organizer")
+async def export_scheme(ctx, name, fmt="csv"):
+    if not store.get_scheme(name):
+        await ctx.send("Scheme not found.")
+        return
+    if fmt not in EXPORT_FORMATS:
+        await ctx.send("Invalid format. Valid formats are 'csv' or 'jsonl'.")
+        return
+    # Rows go to a temp file a batch at a time rather than into one big string
+    with tempfile.TemporaryFile() as out:
+        rows = write_invites(out, store.scheme_invite_batches(name), fmt)
+        out.seek(0)
+        await ctx.send(f"Exported {rows} invites for '{name}'.", file=discord.File(out, filename=f"{name}_invites.{fmt}"))
+
+# Command to apply many invitation status changes from an uploaded CSV/JSONL file (user_id and status columns)
+@bot.command()
+@commands.has_role("scheme-organizer")
+async def import_invites(ctx, name):
+    if not store.get_scheme(name):
+        await ctx.send("Scheme not found.")
+        return
+    if not ctx.message.attachments:
+        await ctx.send("Attach a .csv or .jsonl file with user_id and status columns.")
+        return
+    attachment = ctx.message.attachments[0]
+    try:
+        changes = read_status_changes(attachment.filename, await attachment.read())
+    except ValueError as e:
+        await ctx.send(f"Could not read {attachment.filename}: {e}")
+        return
+    invalid = sorted({status for _, status in changes if status not in INVITE_STATUSES})
+    if invalid:
+        await ctx.send(f"Invalid statuses {', '.join(invalid)}. Valid statuses are: {', '.join(INVITE_STATUSES)}.")
+        return
+    # Applied in a single transaction; the DMs go out from the background queue
+    updated, missing = store.bulk_update_status(name, changes, datetime.now())
+    response = f"Updated {len(updated)} invitations for '{name}'."
+    if missing:
+        response += f" No invite found for {len(missing)} user ids: {', '.join(map(str, missing[:20]))}"
+        if len(missing) > 20:
+            response += ", ..."
+    await ctx.send(response)
+    new_status = dict(changes)
+    batch = dm_queue.enqueue(f"Import into '{name}'",
+                             [(user_id, f"Your invitation status for '{name}' has been changed to {new_status[user_id]}.")
+                              for user_id in updated])
+    if batch.total:
+        message = await ctx.send(batch.summary())
+        start_progress_report(message, batch)
+
+# Command to move every invite (or the first [limit]) of a scheme from one status to another,
+# notifying the users from a rate-limited background queue
+@bot.command()
+@commands.has_role("scheme-organizer")
+async def bulk_status(ctx, name, from_status, to_status, limit: int = None):
+    if not store.get_scheme(name):
+        await ctx.send("Scheme not found.")
+        return
+    if from_status not in INVITE_STATUSES or to_status not in INVITE_STATUSES or from_status == to_status:
+        await ctx.send(f"Invalid statuses. Pick two different statuses from: {', '.join(INVITE_STATUSES)}.")
+        return
+    if limit is not None and limit < 0:
+        await ctx.send("The limit can not be negative.")
+        return
+    user_ids = store.transition_status(name, from_status, to_status, limit, datetime.now())
+    if not user_ids:
+        await ctx.send(f"No invitations for '{name}' are in status {from_status}.")
+        return
+    batch = dm_queue.enqueue(f"Moved {len(user_ids)} '{name}' invitations from {from_status} to {to_status}",
+                             [(user_id, f"Your invitation status for '{name}' has been changed to {to_status}.")
+                              for user_id in user_ids])
+    message = await ctx.send(batch.summary())
+    start_progress_report(message, batch)
+
 @bot.command()
 async def submit_rsvp(ctx, scheme_name):
     member = ctx.author
-    if scheme_name not in schemes:
+    if not store.get_scheme(scheme_name):
         await ctx.send("Scheme not found.")
         return
-    if member.id not in schemes[scheme_name]['invites']:
+    invite = store.get_invite(scheme_name, member.id)
+    if not invite:
         await ctx.send("You do not have an invitation to this scheme.")
         return
 
-    invite = schemes[scheme_name]['invites'][member.id]
     if invite['status'] != 'Invited':
         await ctx.send(f"Your invitation is currently in the status '{invite['status']}'. You must be 'Invited' to submit an RSVP.")
         return
 
     # Collecting RSVP information
-    def check(m):
-        return m.author == member and m.channel == ctx.channel
-
     try:
-        await ctx.send("Please enter your dietary restrictions:")
-        diet = await bot.wait_for('message', timeout=120.0, check=check)
-        
-        await ctx.send("Please enter any allergies you have:")
-        allergies = await bot.wait_for('message', timeout=120.0, check=check)
-
-        await ctx.send("Please enter your date of arrival (YYYY-MM-DD):")
-        arrival = await bot.wait_for('message', timeout=120.0, check=check)
+        answers = await dialogs.ask(ctx, RSVP_STEPS, timeout=120.0)
+    except asyncio.TimeoutError:
+        await ctx.send("You did not respond in time. Please try to submit your RSVP again.")
+        return
+    if answers is None:
+        return
 
-        await ctx.send("Please enter your date of departure (YYYY-MM-DD):")
-        departure = await bot.wait_for('message', timeout=120.0, check=check)
+    current_time = datetime.now()
 
-        current_time = datetime.now()
+    # Update the invitation with RSVP details
+    store.update_invite(scheme_name, member.id,
+                        diet=answers['diet'],
+                        allergies=answers['allergies'],
+                        arrival=answers['arrival'],
+                        departure=answers['departure'],
+                        status='Attending',
+                        last_modified=current_time)
 
-        # Update the invitation with RSVP details
-        invite['diet'] = diet.content
-        invite['allergies'] = allergies.content
-        invite['arrival'] = arrival.content
-        invite['departure'] = departure.content
-        invite['status'] = 'Attending'
-        invite['last_modified'] = current_time
+    await ctx.send("Thank you for submitting your RSVP. Your attendance has been confirmed.")
 
-        await ctx.send("Thank you for submitting your RSVP. Your attendance has been confirmed.")
-    except asyncio.TimeoutError:
-        await ctx.send("You did not respond in time. Please try to submit your RSVP again.")
 
 
+# Command for admins to see which commands are taking the bot's time
+@bot.command(name="perf")
+@commands.has_role("scheme-organizer")
+async def perf_stats(ctx):
+    await send_rows(ctx, (line + "\n" for line in perf.render_text().splitlines()))
 
 # Command to list all available commands
 @bot.command()
@@ -310,9 +435,15 @@ async def q(ctx):
         "alter_scheme_status \"scheme name\" \"scheme_status\" :: Change the status of a scheme (announced, happening, past).",
         "request_scheme_invitation \"scheme name\" :: Request an invitation to a scheme. Your request will be pending at first, and when it is altered to one 'Waitlisted', 'Invited', or 'Revoked', you will be notified via direct message with each change.",
         "my_schemes :: List all schemes you have an invitation associated with.",
+        "list_schemes_admin [file] :: List every scheme with full invite details, in pages or as a text file (scheme-organizer role required).",
+        "scheme_stats \"scheme name\" :: Show how many invites a scheme has in each status.",
         "alter_scheme_invitation_status \"scheme name\" \"userid\" \"status\" :: Change the status of a scheme invitation (scheme-organizer role required).",
         "submit_rsvp \"scheme name\" :: Submit an RSVP once you have been invited to a scheme.",
+        "export_scheme \"scheme name\" [csv|jsonl] :: Download all invites of a scheme as a file (scheme-organizer role required).",
+        "bulk_status \"scheme name\" \"from_status\" \"to_status\" [limit] :: Move all (or the first [limit]) invitations in one status to another and DM everyone moved (scheme-organizer role required).",
+        "import_invites \"scheme name\" :: Apply status changes from an attached CSV/JSONL file with user_id and status columns (scheme-organizer role required).",
         "alter_my_scheme_invitation_status \"scheme name\" \"new_status\" :: Change your own invitation for a scheme to 'Revoked' (from any status) or 'Resubmit' (from 'Revoked' only).",
+        "perf :: Show per-command timings, Discord API calls, event loop lag and open dialogs (scheme-organizer role required).",
         "q :: list all commands."
     ]
     await ctx.send("Available commands:\n" + "\n\n- ".join(commands))
@@ -320,4 +451,7 @@ async def q(ctx):
 
 
 # Replace 'your_bot_token' with your actual Discord bot token
-bot.run(sys.argv[1])
+if __name__ == "__main__":
+    # log_handler=None: discord.py logs through the root queue handler, not its own console handler
+    bot.run(sys.argv[1], log_handler=None)
+    store.close()
@@ -0,0 +1,150 @@
+import asyncio
+import math
+import re
+from datetime import date
+
+
+# Answer checks for dialog steps. Each takes the answer text and the answers
+# given so far, and returns the value to keep or raises ValueError with what
+# to tell the user; the step is then asked again instead of ending the dialog.
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+def valid_email(text, answers):
+    text = text.strip()
+    if not EMAIL_PATTERN.match(text):
+        raise ValueError("That does not look like an email address.")
+    return text
+
+def valid_cell(text, answers):
+    text = text.strip()
+    digits = re.sub(r'[\s().+-]', '', text)
+    if not digits.isdigit() or not 7 <= len(digits) <= 15:
+        raise ValueError("That does not look like a phone number (7 to 15 digits).")
+    return text
+
+def valid_date(text, answers):
+    try:
+        return date.fromisoformat(text.strip()).isoformat()
+    except ValueError:
+        raise ValueError("Dates need to look like 2024-06-30 (YYYY-MM-DD).")
+
+def valid_departure(text, answers):
+    departure = valid_date(text, answers)
+    if 'arrival' in answers and departure < answers['arrival']:
+        raise ValueError(f"Departure can not be before your arrival on {answers['arrival']}.")
+    return departure
+
+
+# One user's open dialog: the steps, (key, prompt, check or None), where they
+# are, and what prompts are sent through (the command's ctx). Messages up to
+# and including the command that opened it (snowflake ids grow over time)
+# are never taken as answers.
+class Dialog:
+    def __init__(self, key, channel, steps, timeout, after_id):
+        self.key = key
+        self.channel = channel
+        self.after_id = after_id
+        self.steps = steps
+        self.timeout = timeout
+        self.step = 0
+        self.answers = {}
+        self.future = asyncio.get_running_loop().create_future()
+        self.expires_tick = 0
+        self.slot = None
+
+    @property
+    def prompt(self):
+        return self.steps[self.step][1]
+
+
+# Runs multi-step question dialogs for many users at once. Every message goes
+# through one listener that finds its dialog with a single dict lookup on
+# (channel id, author id), instead of discord.py testing every pending
+# wait_for predicate against it. Timeouts live on a timer wheel: `slots`
+# buckets of `tick` seconds, swept by one background task.
+class DialogEngine:
+    def __init__(self, bot, perf=None, tick=1.0, slots=256):
+        self._bot = bot
+        self._perf = perf
+        self._tick = tick
+        self._wheel = [set() for _ in range(slots)]
+        self._now_tick = 0
+        self._timer_task = None
+        self.sessions = {}  # (channel id, author id) -> Dialog
+
+    def install(self):
+        self._bot.add_listener(self.on_message, 'on_message')
+        return self
+
+    # Asks each step in turn where the command was given (a DM or a guild
+    # channel) and returns {key: answer}. Raises asyncio.TimeoutError when a
+    # step goes unanswered for `timeout` seconds. Returns None, after saying
+    # so, if the user already has a dialog open in that channel.
+    async def ask(self, ctx, steps, timeout=60.0):
+        key = (ctx.channel.id, ctx.author.id)
+        if key in self.sessions:
+            await ctx.send("Please finish the questions you are already answering first.")
+            return None
+        dialog = Dialog(key, ctx, steps, timeout, ctx.message.id)
+        self.sessions[key] = dialog
+        self._schedule(dialog)
+        if self._perf is not None:
+            self._perf.open_dialogs += 1
+        try:
+            await ctx.send(dialog.prompt)
+            return await dialog.future
+        finally:
+            self._close(dialog)
+            if self._perf is not None:
+                self._perf.open_dialogs -= 1
+
+    async def on_message(self, message):
+        dialog = self.sessions.get((message.channel.id, message.author.id))
+        # discord.py runs the command from on_message before this listener
+        # sees the same message, so the command itself would be the first answer
+        if dialog is None or dialog.future.done() or message.id <= dialog.after_id:
+            return
+        # The state changes before any await, so a quick second answer
+        # always lands on the step after this one
+        key, prompt, check = dialog.steps[dialog.step]
+        try:
+            dialog.answers[key] = check(message.content, dialog.answers) if check else message.content
+        except ValueError as e:
+            self._schedule(dialog)
+            await dialog.channel.send(f"{e} {prompt}")
+            return
+        dialog.step += 1
+        if dialog.step == len(dialog.steps):
+            self._close(dialog)
+            dialog.future.set_result(dialog.answers)
+            return
+        self._schedule(dialog)
+        await dialog.channel.send(dialog.prompt)
+
+    def _close(self, dialog):
+        if self.sessions.get(dialog.key) is dialog:
+            del self.sessions[dialog.key]
+        if dialog.slot is not None:
+            self._wheel[dialog.slot].discard(dialog)
+            dialog.slot = None
+
+    # (Re)starts the dialog's timeout, moving it to the slot it expires in
+    def _schedule(self, dialog):
+        if dialog.slot is not None:
+            self._wheel[dialog.slot].discard(dialog)
+        dialog.expires_tick = self._now_tick + max(1, math.ceil(dialog.timeout / self._tick))
+        dialog.slot = dialog.expires_tick % len(self._wheel)
+        self._wheel[dialog.slot].add(dialog)
+        if self._timer_task is None:
+            self._timer_task = asyncio.ensure_future(self._run_wheel())
+
+    async def _run_wheel(self):
+        while True:
+            await asyncio.sleep(self._tick)
+            self._now_tick += 1
+            slot = self._wheel[self._now_tick % len(self._wheel)]
+            # Timeouts longer than one turn of the wheel wait for a later pass
+            for dialog in [dialog for dialog in slot if dialog.expires_tick <= self._now_tick]:
+                self._close(dialog)
+                if not dialog.future.done():
+                    dialog.future.set_exception(asyncio.TimeoutError())
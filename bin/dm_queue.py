@@ -0,0 +1,153 @@
+import asyncio
+import contextvars
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+# Classic token bucket: `rate` tokens a second, at most `capacity` banked.
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    # Waits for a token; returns how long it had to wait, in seconds
+    async def take(self):
+        async with self._lock:
+            waited = 0.0
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+# One organizer command's worth of DMs, with its running tally
+class DMBatch:
+    def __init__(self, label, total):
+        self.label = label
+        self.total = total
+        self.sent = 0
+        self.forbidden = []  # user ids with DMs disabled
+        self.failed = []     # user ids that could not be found or kept erroring
+        self.done = asyncio.Event()
+        if not total:
+            self.done.set()
+
+    def _finish_one(self):
+        if self.sent + len(self.forbidden) + len(self.failed) == self.total:
+            self.done.set()
+
+    def summary(self):
+        finished = self.sent + len(self.forbidden) + len(self.failed)
+        text = f"{self.label}: notified {self.sent}/{self.total}"
+        if not self.done.is_set():
+            text += f" ({self.total - finished} queued)"
+        if self.forbidden:
+            text += f", DMs disabled for {len(self.forbidden)}: {', '.join(map(str, self.forbidden[:20]))}"
+        if self.failed:
+            text += f", failed for {len(self.failed)}: {', '.join(map(str, self.failed[:20]))}"
+        return text + "."
+
+
+# Background DM fan-out. Commands enqueue and return at once; a few workers
+# drain the queue under a shared token bucket, retrying transient errors.
+class DMQueue:
+    def __init__(self, user_cache, rate=2.0, burst=5, workers=2, max_retries=3):
+        self._user_cache = user_cache
+        self._bucket = TokenBucket(rate, burst)
+        self._worker_count = workers
+        self._max_retries = max_retries
+        self._queue = asyncio.Queue()
+        self._workers = []
+        self.rate_limit_wait = 0.0  # seconds spent waiting on the bucket, all time
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # Workers start with the first batch, inside the bot's running loop. They
+    # get a fresh context so their sends are not billed to that first command.
+    def _ensure_workers(self):
+        if not self._workers:
+            loop = asyncio.get_running_loop()
+            self._workers = [loop.create_task(self._work(), context=contextvars.Context())
+                             for _ in range(self._worker_count)]
+
+    def enqueue(self, label, messages):
+        batch = DMBatch(label, len(messages))
+        for user_id, text in messages:
+            self._queue.put_nowait((batch, user_id, text))
+        if messages:
+            self._ensure_workers()
+        return batch
+
+    async def _work(self):
+        while True:
+            batch, user_id, text = await self._queue.get()
+            try:
+                await self._deliver(batch, user_id, text)
+            except Exception:
+                logger.exception(f"Unexpected error sending DM to {user_id}")
+                batch.failed.append(user_id)
+            finally:
+                batch._finish_one()
+                self._queue.task_done()
+
+    async def _deliver(self, batch, user_id, text):
+        for attempt in range(self._max_retries + 1):
+            self.rate_limit_wait += await self._bucket.take()
+            try:
+                user = await self._user_cache.get(user_id)
+                if user is None:
+                    batch.failed.append(user_id)
+                    return
+                await user.send(text)
+                batch.sent += 1
+                return
+            except discord.errors.Forbidden:
+                batch.forbidden.append(user_id)
+                return
+            except discord.HTTPException as e:
+                logger.warning(f"DM to {user_id} failed (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(2 ** attempt)
+        batch.failed.append(user_id)
+
+
+# Keeps one progress message up to date until the batch is drained. The last
+# edit always happens, even for a batch that drained before the message was sent.
+async def report_progress(message, batch, interval=5.0):
+    while not batch.done.is_set():
+        try:
+            await asyncio.wait_for(batch.done.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        if not batch.done.is_set():
+            await message.edit(content=batch.summary())
+    await message.edit(content=batch.summary())
+
+
+# Running report_progress tasks; holding them here keeps them from being
+# garbage collected mid-run, and their errors get logged when they end
+_progress_tasks = set()
+
+def start_progress_report(message, batch):
+    task = asyncio.ensure_future(report_progress(message, batch))
+    _progress_tasks.add(task)
+    task.add_done_callback(_progress_report_done)
+    return task
+
+def _progress_report_done(task):
+    _progress_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Progress report failed", exc_info=task.exception())
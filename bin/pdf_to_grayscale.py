@@ -1,45 +1,309 @@
 import os
 import sys
+import json
+import time
+import zlib
+import struct
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import fitz  # PyMuPDF
 
-def convert_pdf_to_grayscale(input_pdf_path, output_pdf_path, out_png_dir):
+COMPRESSIONS = ["flate", "jpeg"]
+
+# Render settings shared by every page of a conversion:
+#     dpi          resolution pages are rasterized at
+#     compression  "flate" (lossless PNG) or "jpeg" for the inserted images
+#     quality      JPEG quality, 1-100
+#     tile_pixels  pages bigger than this are rendered in horizontal bands
+#                  of at most this many pixels, so memory stays bounded
+#     vector       keep pages without images as vector graphics, recolored
+#                  to gray, and only rasterize pages that contain images
+DEFAULT_SETTINGS = {"dpi": 150, "compression": "flate", "quality": 85, "tile_pixels": 16_000_000, "vector": False}
+
+def encode_pixmap(pixmap, settings):
+    if settings["compression"] == "jpeg":
+        return pixmap.tobytes("jpeg", jpg_quality=settings["quality"])
+    return pixmap.tobytes("png")
+
+def write_gray_png(path, width, height, samples):
+    # Minimal 8-bit grayscale PNG writer. zlib releases the GIL while it
+    # compresses, so PNGs written from the writer threads overlap rendering.
+    rows = b"".join(b"\x00" + samples[row * width:(row + 1) * width] for row in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows, 6)))
+        f.write(chunk(b"IEND", b""))
+
+# PNG writer threads, one pool per process, created on first use
+_png_writers = None
+
+def png_writers():
+    global _png_writers
+    if _png_writers is None:
+        _png_writers = ThreadPoolExecutor(max_workers=2)
+    return _png_writers
+
+def png_path(png_dir, pdf_path, page_number):
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(png_dir, f"{stem}_page{page_number + 1:04d}.png")
+
+def render_gray_page(page, settings, png_file_path=None, png_jobs=None):
+    # Renders straight into the gray colorspace in one pass, a band at a
+    # time for very large pages. Returns the bands as (rect in points,
+    # encoded image) so the page can be rebuilt at its original size. With
+    # png_file_path set, each band is also queued for the PNG writers
+    # (a tiled page gets one PNG per band, with _partNN added to the name).
+    zoom = settings["dpi"] / 72
+    width_pixels = max(1, int(page.rect.width * zoom))
+    band_rows = max(1, settings["tile_pixels"] // width_pixels)
+    band_height = band_rows / zoom
+    tiles = []
+    top = page.rect.y0
+    while top < page.rect.y1:
+        clip = fitz.Rect(page.rect.x0, top, page.rect.x1, min(top + band_height, page.rect.y1))
+        pixmap = page.get_pixmap(dpi=settings["dpi"], colorspace=fitz.csGRAY, clip=clip)
+        if png_file_path:
+            path = png_file_path if band_height >= page.rect.height else f"{png_file_path[:-4]}_part{len(tiles) + 1:02d}.png"
+            png_jobs.append(png_writers().submit(write_gray_png, path, pixmap.width, pixmap.height, pixmap.samples))
+        tiles.append((tuple(clip), encode_pixmap(pixmap, settings)))
+        top = clip.y1
+    return tiles
+
+def render_gray_pages(input_pdf_path, first_page, last_page, settings, png_dir=None):
+    # Renders pages [first_page, last_page) to grayscale; runs in a worker
+    # process, so it opens its own copy of the document. Each page comes back
+    # as (width, height, tiles), with tiles None for a page kept as vectors.
+    # Returns once the range's PNGs, if any, are written.
+    document = fitz.open(input_pdf_path)
+    pages = []
+    png_jobs = []
+    for page_number in range(first_page, last_page):
+        # Get a page
+        page = document.load_page(page_number)
+        png_file_path = png_path(png_dir, input_pdf_path, page_number) if png_dir else None
+        if settings["vector"] and not page.get_images():
+            if png_file_path:
+                render_gray_page(page, settings, png_file_path, png_jobs)
+            pages.append((page.rect.width, page.rect.height, None))
+            continue
+        pages.append((page.rect.width, page.rect.height, render_gray_page(page, settings, png_file_path, png_jobs)))
+    document.close()
+    for job in png_jobs:
+        job.result()
+    return pages
+
+def page_ranges(input_pdf_path, page_count, png_dir=None, pages_per_task=8):
+    # One render task per run of pages_per_task pages
+    return [(input_pdf_path, first, min(first + pages_per_task, page_count), png_dir)
+            for first in range(0, page_count, pages_per_task)]
+
+def iter_rendered_ranges(tasks, settings, pool=None, jobs=1):
+    # Yields each page_ranges task's pages, in task order. With a process
+    # pool, tasks render there; only jobs * 2 are in flight at once, so
+    # finished pages waiting for an earlier task never pile up. The tasks may
+    # come from many PDFs, keeping every worker busy across file boundaries.
+    if pool is None:
+        for input_pdf_path, first, last, png_dir in tasks:
+            yield render_gray_pages(input_pdf_path, first, last, settings, png_dir)
+        return
+    in_flight = []
+    next_task = 0
+    while in_flight or next_task < len(tasks):
+        while next_task < len(tasks) and len(in_flight) < jobs * 2:
+            input_pdf_path, first, last, png_dir = tasks[next_task]
+            in_flight.append(pool.submit(render_gray_pages, input_pdf_path, first, last, settings, png_dir))
+            next_task += 1
+        yield in_flight.pop(0).result()
+
+def iter_gray_pages(input_pdf_path, page_count, settings, pool=None, jobs=1, png_dir=None, pages_per_task=8):
+    # Yields every page's render in order
+    tasks = page_ranges(input_pdf_path, page_count, png_dir, pages_per_task)
+    for pages in iter_rendered_ranges(tasks, settings, pool, jobs):
+        yield from pages
+
+def convert_pdf_to_grayscale(input_pdf_path, output_pdf_path, out_png_dir=None, jobs=1, settings=None):
+    # Writes the grayscale PDF and, with out_png_dir, one PNG per page named
+    # <pdf name>_pageNNNN.png. Returns the number of pages converted.
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    if out_png_dir:
+        os.makedirs(out_png_dir, exist_ok=True)
+    with fitz.open(input_pdf_path) as document:
+        page_count = document.page_count
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        pages = iter_gray_pages(input_pdf_path, page_count, settings, pool, jobs, out_png_dir)
+        write_gray_pdf(input_pdf_path, output_pdf_path, pages)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if out_png_dir:
+        print(f"Saved {page_count} grayscale PNGs in {out_png_dir}")
+    return page_count
+
+def write_gray_pdf(input_pdf_path, output_pdf_path, pages):
+    # Builds the output PDF from the rendered pages, in page order
+
     # Open the provided PDF file
     document = fitz.open(input_pdf_path)
 
     # Create a new PDF for output
     new_document = fitz.open()
 
-    for page_number in range(document.page_count):
-        # Get a page
-        page = document.load_page(page_number)
-        
-        # Convert the page to a pixmap (an image)
-        pixmap = page.get_pixmap()
-
-        # Convert the pixmap to grayscale
-        gray_pixmap = fitz.Pixmap(fitz.csGRAY, pixmap)
-
-        # Save the grayscale image as a PNG file
-        png_file_path = out_png
-        gray_pixmap.save(png_file_path)
-        print(f"Saved grayscale PNG: {png_file_path}")
-        
+    for page_number, (width, height, tiles) in enumerate(pages):
+        if tiles is None:
+            # Vector page: copy it over as is and turn its colors gray
+            new_document.insert_pdf(document, from_page=page_number, to_page=page_number)
+            new_document[-1].recolor(1)
+            continue
+
         # Create a new PDF page with the same size as the original
-        new_page = new_document.new_page(width = gray_pixmap.width, height = gray_pixmap.height)
-        
-        # Insert the grayscale image
-        new_page.insert_image(new_page.rect, pixmap=gray_pixmap)
+        new_page = new_document.new_page(width = width, height = height)
+
+        for rect, image in tiles:
+            # Insert the grayscale image; JPEG data is embedded as is
+            new_page.insert_image(fitz.Rect(rect), stream=image)
 
     # Save the new document
-    new_document.save(output_pdf_path)
+    new_document.save(output_pdf_path, garbage=3, deflate=True)
     new_document.close()
     document.close()
     print(f"Converted PDF saved as '{output_pdf_path}'")
 
+# Batch mode remembers what each output was made from in this file, kept
+# in the output directory, so touched-but-unchanged inputs are not redone
+MANIFEST_NAME = ".grayscale_manifest.json"
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_up_to_date(input_pdf_path, output_pdf_path, record, settings, png_dir=None):
+    # Up to date when the output is newer than the input, or when the input's
+    # content hash still matches the one the output was made from. Either
+    # way the output must have been made with the same settings and, when
+    # PNGs are wanted, have written them to the same directory.
+    if not os.path.exists(output_pdf_path) or not record or record.get("settings") != settings:
+        return False
+    if png_dir and record.get("png_dir") != png_dir:
+        return False
+    if os.path.getmtime(output_pdf_path) >= os.path.getmtime(input_pdf_path):
+        return True
+    return record.get("sha256") == file_sha256(input_pdf_path)
+
+# Where a batch PDF's page PNGs go: its subdirectory of png_dir, or None
+def pdf_png_path(png_dir, relative):
+    if not png_dir:
+        return None
+    return os.path.abspath(os.path.join(png_dir, os.path.dirname(relative)))
+
+def convert_directory(input_dir, output_dir, png_dir=None, jobs=1, settings=None):
+    # Converts every PDF under input_dir into the same layout under
+    # output_dir. The page ranges of all of them go through one worker pool
+    # as a single stream, so a directory of small PDFs still uses every
+    # worker; each output and its manifest entry is written as soon as its
+    # last range is done.
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    todo = []
+    skipped = 0
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(".pdf"):
+                continue
+            input_pdf_path = os.path.join(root, name)
+            relative = os.path.relpath(input_pdf_path, input_dir)
+            output_pdf_path = os.path.join(output_dir, relative)
+            pdf_png_dir = pdf_png_path(png_dir, relative)
+            if is_up_to_date(input_pdf_path, output_pdf_path, manifest.get(relative), settings, pdf_png_dir):
+                skipped += 1
+                continue
+            todo.append(relative)
+    print(f"{len(todo)} PDFs to convert, {skipped} already up to date")
+
+    start = time.perf_counter()
+    pages = 0
+    tasks = []
+    task_counts = []
+    for relative in todo:
+        input_pdf_path = os.path.join(input_dir, relative)
+        os.makedirs(os.path.dirname(os.path.join(output_dir, relative)), exist_ok=True)
+        pdf_png_dir = pdf_png_path(png_dir, relative)
+        if pdf_png_dir:
+            os.makedirs(pdf_png_dir, exist_ok=True)
+        with fitz.open(input_pdf_path) as document:
+            page_count = document.page_count
+        pdf_tasks = page_ranges(input_pdf_path, page_count, pdf_png_dir)
+        tasks += pdf_tasks
+        task_counts.append(len(pdf_tasks))
+        pages += page_count
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        rendered = iter_rendered_ranges(tasks, settings, pool, jobs)
+        for relative, task_count in zip(todo, task_counts):
+            input_pdf_path = os.path.join(input_dir, relative)
+            sha256 = file_sha256(input_pdf_path)
+            pdf_pages = (page for _ in range(task_count) for page in next(rendered))
+            write_gray_pdf(input_pdf_path, os.path.join(output_dir, relative), pdf_pages)
+            manifest[relative] = {"sha256": sha256, "settings": settings, "png_dir": pdf_png_path(png_dir, relative)}
+            with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1)
+            os.replace(manifest_path + ".tmp", manifest_path)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"Converted {len(todo)} PDFs, {pages} pages in {elapsed:.1f}s "
+          f"({pages / elapsed if elapsed else 0:.1f} pages/sec), {skipped} skipped")
+
 # Example usage
 if __name__ == "__main__":
-    input_pdf = sys.argv[1]
-    output_pdf = sys.argv[2]
-    out_png = sys.argv[3]
-    convert_pdf_to_grayscale(input_pdf, output_pdf, out_png)
+    parser = argparse.ArgumentParser(description="Convert a PDF, or a directory of PDFs, to grayscale.")
+    parser.add_argument("input_pdf", nargs="?", help="PDF to convert")
+    parser.add_argument("output_pdf", nargs="?", help="Where to write the grayscale PDF")
+    parser.add_argument("out_png_dir", nargs="?", help="Directory for a grayscale PNG of each page (optional)")
+    parser.add_argument("-i", "--input-dir", help="Convert every PDF under this directory instead of one file")
+    parser.add_argument("-o", "--output-dir", help="Where --input-dir PDFs go, same layout; up to date ones are skipped")
+    parser.add_argument("-p", "--png-dir", help="With --input-dir, directory for per-page PNGs")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Processes rendering pages in parallel (default 1)")
+    parser.add_argument("-d", "--dpi", type=int, default=DEFAULT_SETTINGS["dpi"], help="Rendering resolution (default 150)")
+    parser.add_argument("-c", "--compression", choices=COMPRESSIONS, default=DEFAULT_SETTINGS["compression"], help="Image compression: flate (lossless) or jpeg (default flate)")
+    parser.add_argument("-q", "--quality", type=int, default=DEFAULT_SETTINGS["quality"], help="JPEG quality 1-100 (default 85)")
+    parser.add_argument("--tile-megapixels", type=float, default=DEFAULT_SETTINGS["tile_pixels"] / 1e6, help="Render pages larger than this in bands of this size (default 16)")
+    parser.add_argument("--vector", action="store_true", help="Keep pages without images as vector graphics (recolored to gray); only rasterize pages with images")
+    args = parser.parse_args()
+
+    if args.input_dir:
+        if not args.output_dir or not os.path.isdir(args.input_dir):
+            print("--input-dir needs an existing input directory and --output-dir")
+            sys.exit(1)
+    elif not args.input_pdf or not args.output_pdf:
+        parser.error("give input_pdf and output_pdf, or --input-dir and --output-dir")
+    elif not os.path.exists(args.input_pdf):
+        print(f"Input PDF does not exist: {args.input_pdf}")
+        sys.exit(1)
+    if args.vector and not hasattr(fitz.Page, "recolor"):
+        print("--vector needs a newer PyMuPDF (Page.recolor); upgrade with pip install -U pymupdf")
+        sys.exit(1)
+    settings = {"dpi": args.dpi, "compression": args.compression, "quality": args.quality,
+                "tile_pixels": int(args.tile_megapixels * 1e6), "vector": args.vector}
+    if args.input_dir:
+        convert_directory(args.input_dir, args.output_dir, args.png_dir, args.jobs, settings)
+    else:
+        convert_pdf_to_grayscale(args.input_pdf, args.output_pdf, args.out_png_dir, args.jobs, settings)
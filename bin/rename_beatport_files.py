@@ -1,20 +1,133 @@
 import sys
 import os
 import re
-
-# Set the directory where the files are located
-directory = sys.argv[1]
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Regular expression to capture the leading string of integers followed by an underscore
 pattern = re.compile(r'^\d+_')
 
-# Process each file in the directory
-for filename in os.listdir(directory):
-    # Check if the filename matches the pattern
-    new_name = pattern.sub('', filename)
-    # If the name has changed, rename the file
-    if new_name != filename:
-        old_path = os.path.join(directory, filename)
-        new_path = os.path.join(directory, new_name)
-        os.rename(old_path, new_path)
-        print(f'Renamed: {old_path} -> {new_path}')
+def walk_files(directory, recursive=True):
+    # Yields (directory, [file names]) for every directory, using scandir so
+    # file types come from the directory listing without a stat per file
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        files = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append(entry.name)
+        except OSError as e:
+            print(f'Could not read {current}: {e}')
+            continue
+        yield current, files
+
+def build_plan(directory, recursive=True):
+    # Works out every rename before touching anything. Names are indexed per
+    # directory (case-folded, as on macOS and Windows volumes); a rename whose
+    # new name is already taken, by an existing file or by another rename in
+    # the plan, is left out and reported instead of overwriting.
+    plan = []
+    collisions = []
+    for current, files in walk_files(directory, recursive):
+        taken = {name.casefold() for name in files}
+        for filename in sorted(files):
+            new_name = pattern.sub('', filename)
+            if new_name == filename:
+                continue
+            old_path = os.path.join(current, filename)
+            new_path = os.path.join(current, new_name)
+            if not new_name or new_name.casefold() in taken:
+                collisions.append((old_path, new_path))
+                continue
+            taken.add(new_name.casefold())
+            plan.append((old_path, new_path))
+    return plan, collisions
+
+def rename(old_path, new_path):
+    # os.rename overwrites silently on POSIX, so check again right before
+    if os.path.lexists(new_path):
+        raise FileExistsError(f'{new_path} already exists')
+    os.rename(old_path, new_path)
+
+def run_plan(plan, journal_path=None, jobs=16, verbose=False):
+    # Renames on network mounts are latency-bound, so run them on a thread
+    # pool. Each finished rename is appended to the journal straight away,
+    # so even an interrupted batch can be rolled back with --undo. The
+    # journal is only created once a rename succeeds, so runs that change
+    # nothing leave no empty journal behind.
+    journal = None
+    done = 0
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(rename, old_path, new_path): (old_path, new_path) for old_path, new_path in plan}
+            for future in as_completed(futures):
+                old_path, new_path = futures[future]
+                try:
+                    future.result()
+                except OSError as e:
+                    failed += 1
+                    print(f'Failed: {old_path} -> {new_path}: {e}')
+                    continue
+                done += 1
+                if journal_path:
+                    if journal is None:
+                        journal = open(journal_path, 'a', encoding='utf-8')
+                    journal.write(json.dumps({'old': old_path, 'new': new_path}) + '\n')
+                    journal.flush()
+                if verbose:
+                    print(f'Renamed: {old_path} -> {new_path}')
+    finally:
+        if journal:
+            journal.close()
+    return done, failed
+
+def read_journal(journal_path):
+    # The renames to reverse, last first
+    with open(journal_path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [(record['new'], record['old']) for record in reversed(records)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strip the leading 'NN_' track numbers Beatport puts on file names.")
+    parser.add_argument("directory", nargs="?", help="Directory of files to rename (searched recursively)")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Print the renames without doing them")
+    parser.add_argument("-j", "--jobs", type=int, default=16, help="Renames in flight at once (default 16)")
+    parser.add_argument("--no-recursive", action="store_true", help="Only rename files directly in the directory")
+    parser.add_argument("--journal", help="Undo journal to write (default .rename_journal_<time>.jsonl in the directory)")
+    parser.add_argument("--undo", metavar="JOURNAL", help="Reverse the renames recorded in this journal")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every rename")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.undo:
+        plan = read_journal(args.undo)
+        collisions = []
+        journal_path = None
+    elif args.directory and os.path.isdir(args.directory):
+        plan, collisions = build_plan(args.directory, not args.no_recursive)
+        journal_path = args.journal or os.path.join(args.directory, f'.rename_journal_{time.strftime("%Y%m%d_%H%M%S")}.jsonl')
+    else:
+        print("Give a directory to rename, or --undo JOURNAL")
+        sys.exit(1)
+
+    for old_path, new_path in collisions:
+        print(f'Skipped, name already taken: {old_path} -> {new_path}')
+    if args.dry_run:
+        for old_path, new_path in plan:
+            print(f'Would rename: {old_path} -> {new_path}')
+        print(f'{len(plan)} files would be renamed, {len(collisions)} skipped for collisions')
+        sys.exit(0)
+
+    done, failed = run_plan(plan, journal_path, args.jobs, args.verbose)
+    print(f'Renamed {done} files in {time.perf_counter() - start:.1f}s, {failed} failed, {len(collisions)} skipped for collisions')
+    if journal_path and done:
+        print(f'Undo with: {sys.argv[0]} --undo {journal_path}')
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# Content-addressed on-disk cache for API results (recognitions, translations,
+# language detections). Entries are JSON files named by the SHA-256 of what was
+# sent, under <directory>/<namespace>/<first two hex digits>/. A hit refreshes
+# the file's mtime; once the cache grows past `max_bytes` the least recently
+# used entries are deleted until it is back under 90% of that.
+class ResultCache:
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = {}    # namespace -> count
+        self.misses = {}  # namespace -> count
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    # Hash of everything that determines a result, e.g. audio bytes plus config
+    @staticmethod
+    def key(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, bytes):
+                part = str(part).encode('utf-8')
+            digest.update(len(part).to_bytes(8, 'big'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _path(self, namespace, key):
+        return os.path.join(self.directory, namespace, key[:2], key + '.json')
+
+    def _count(self, counts, namespace):
+        with self._lock:
+            counts[namespace] = counts.get(namespace, 0) + 1
+
+    def get(self, namespace, key):
+        path = self._path(namespace, key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self._count(self.misses, namespace)
+            return None
+        self._count(self.hits, namespace)
+        return value
+
+    def put(self, namespace, key, value):
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+        with self._lock:
+            self._size += len(data)
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _entries(self):
+        for namespace in os.scandir(self.directory):
+            if not namespace.is_dir():
+                continue
+            for bucket in os.scandir(namespace.path):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    if entry.name.endswith('.json'):
+                        stat = entry.stat()
+                        yield entry.path, stat.st_mtime, stat.st_size
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            size = sum(entry[2] for entry in entries)
+            target = self.max_bytes * 0.9
+            removed = 0
+            for path, _, entry_size in entries:
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= entry_size
+                removed += 1
+            self._size = size
+        logger.info(f"Evicted {removed} cache entries, cache is now {size / 1024 / 1024:.1f}MB")
+
+    # e.g. "recognize 12/50 (24%), translate 1/1 (100%)"
+    def summary(self):
+        parts = []
+        for namespace in sorted(set(self.hits) | set(self.misses)):
+            hits = self.hits.get(namespace, 0)
+            total = hits + self.misses.get(namespace, 0)
+            parts.append(f"{namespace} {hits}/{total} ({hits / total:.0%})")
+        return ', '.join(parts) or "no lookups"
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from scheme_store import INVITE_FIELDS
+
+# Column order for exported invites
+EXPORT_FIELDS = ['user_id'] + INVITE_FIELDS
+EXPORT_FORMATS = ['csv', 'jsonl']
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# Writes invite batches to a binary file one row at a time; returns the row count
+def write_invites(out, invite_batches, fmt):
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    rows = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(text, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+    for batch in invite_batches:
+        for invite in batch:
+            record = {field: _export_value(invite.get(field)) for field in EXPORT_FIELDS}
+            if fmt == 'csv':
+                writer.writerow(record)
+            else:
+                text.write(json.dumps(record) + '\n')
+            rows += 1
+    text.flush()
+    text.detach()
+    return rows
+
+
+# Reads (user_id, status) pairs from an uploaded CSV or JSONL file. Only the
+# user_id and status columns are used, so an edited export can be fed back.
+def read_status_changes(filename, data):
+    text = data.decode('utf-8-sig')
+    if filename.endswith('.jsonl'):
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    elif filename.endswith('.csv'):
+        records = list(csv.DictReader(io.StringIO(text)))
+    else:
+        raise ValueError("Upload a .csv or .jsonl file.")
+    changes = []
+    for line_number, record in enumerate(records, start=1):
+        try:
+            changes.append((int(record['user_id']), record['status'].strip()))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError(f"Row {line_number} needs a numeric user_id and a status.")
+    return changes
@@ -0,0 +1,244 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from scheme_store import MemorySchemeStore, DATE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Journal record ops
+CREATE_SCHEME = 'c'
+SCHEME_STATUS = 's'
+ADD_INVITE = 'a'
+UPDATE_INVITE = 'u'
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot journal {type(value).__name__}")
+
+
+def _parse_dates(fields):
+    for field in DATE_FIELDS:
+        if fields.get(field):
+            fields[field] = datetime.fromisoformat(fields[field])
+    return fields
+
+
+# The memory store made durable without a blocking write per command. Each
+# mutation is appended to a pending list; a background task writes and
+# fsyncs whatever has piled up every `flush_interval` seconds, off the event
+# loop thread. Every `compact_interval` seconds the journal is rotated and the
+# state as of the rotation is written out as a snapshot, after which the older
+# journals are deleted. Startup loads the snapshot and replays the journal
+# generations written after it.
+#
+# Records only ever set values (an add for an existing invite is refused), so
+# replaying a record whose effect is already in the snapshot changes nothing.
+# That lets rotation simply bump the generation: records still pending go to
+# the new journal even if the snapshot already has them.
+#
+# Layout of `directory`:
+#     snapshot.json          state before journal generation N (N is stored inside)
+#     journal-000000N.jsonl  one JSON array per mutation
+class JournalSchemeStore(MemorySchemeStore):
+    def __init__(self, directory, flush_interval=0.05, compact_interval=300.0, compact_min_records=10000):
+        super().__init__()
+        self._directory = directory
+        self._flush_interval = flush_interval
+        self._compact_interval = compact_interval
+        self._compact_min_records = compact_min_records
+        self._pending = []
+        self._io_lock = threading.Lock()
+        self._journal_file = None
+        self._journal_file_generation = None
+        self._background = None
+        self._last_compact = time.monotonic()
+        self._records_since_compact = 0
+        self._replaying = True
+        os.makedirs(directory, exist_ok=True)
+        self._generation = self._load()
+        self._replaying = False
+
+    # -- mutations: apply in memory, then queue a journal record
+
+    def create_scheme(self, name, description, status='announced'):
+        if not super().create_scheme(name, description, status):
+            return False
+        self._journal([CREATE_SCHEME, name, description, status])
+        return True
+
+    def set_scheme_status(self, name, status):
+        super().set_scheme_status(name, status)
+        self._journal([SCHEME_STATUS, name, status])
+
+    def add_invite(self, name, user_id, invite):
+        if not super().add_invite(name, user_id, invite):
+            return False
+        fields = {key: value for key, value in invite.items() if key not in ('scheme', 'user_id')}
+        self._journal([ADD_INVITE, name, user_id, fields])
+        return True
+
+    def update_invite(self, name, user_id, **fields):
+        invite = super().update_invite(name, user_id, **fields)
+        self._journal([UPDATE_INVITE, name, user_id, fields])
+        return invite
+
+    def _journal(self, record):
+        if self._replaying:
+            return
+        self._pending.append(json.dumps(record, separators=(',', ':'), default=_json_default))
+        self._records_since_compact += 1
+        if self._background is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # no loop (scripts, benchmarks): the caller flushes
+            self._background = loop.create_task(self._run_background())
+
+    # -- loading
+
+    def _journal_path(self, generation):
+        return os.path.join(self._directory, f"journal-{generation:08d}.jsonl")
+
+    def _load(self):
+        generation = 0
+        snapshot_path = os.path.join(self._directory, 'snapshot.json')
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            generation = snapshot['journal']
+            for scheme in snapshot['schemes']:
+                MemorySchemeStore.create_scheme(self, scheme['name'], scheme['description'], scheme['status'])
+            for invite in snapshot['invites']:
+                MemorySchemeStore.add_invite(self, invite.pop('scheme'), invite.pop('user_id'), _parse_dates(invite))
+        journals = sorted(glob.glob(os.path.join(self._directory, 'journal-*.jsonl')))
+        for path in journals:
+            journal_generation = int(os.path.basename(path)[len('journal-'):-len('.jsonl')])
+            if journal_generation < generation:
+                continue  # already in the snapshot, left behind by an interrupted compaction
+            self._replay(path)
+            generation = journal_generation
+        return generation
+
+    def _replay(self, path):
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Only the last line can be torn by a crash mid-write
+                    logger.warning(f"Skipping unreadable journal line {line_number} in {path}")
+                    continue
+                op = record[0]
+                if op == CREATE_SCHEME:
+                    self.create_scheme(*record[1:])
+                elif op == SCHEME_STATUS:
+                    self.set_scheme_status(*record[1:])
+                elif op == ADD_INVITE:
+                    self.add_invite(record[1], record[2], _parse_dates(record[3]))
+                elif op == UPDATE_INVITE:
+                    self.update_invite(record[1], record[2], **_parse_dates(record[3]))
+
+    # -- writing
+
+    def _open_journal(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+        path = self._journal_path(self._generation)
+        # A crash can leave the last line without its newline; end it before appending
+        torn = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+        self._journal_file = open(path, 'a', encoding='utf-8')
+        self._journal_file_generation = self._generation
+        if torn:
+            self._journal_file.write('\n')
+
+    def _write(self, lines):
+        with self._io_lock:
+            if self._journal_file_generation != self._generation:
+                self._open_journal()
+            if lines:
+                self._journal_file.write('\n'.join(lines) + '\n')
+                self._journal_file.flush()
+                os.fsync(self._journal_file.fileno())
+
+    def _take_pending(self):
+        lines = self._pending
+        self._pending = []
+        return lines
+
+    def flush(self):
+        self._write(self._take_pending())
+
+    async def flush_async(self):
+        lines = self._take_pending()
+        if lines:
+            try:
+                await asyncio.to_thread(self._write, lines)
+            except Exception:
+                self._pending[:0] = lines
+                raise
+
+    # Starts a new journal generation and returns a copy of the state so far.
+    # The next write switches files; nothing here touches the disk.
+    def _rotate(self):
+        self._generation += 1
+        self._records_since_compact = 0
+        self._last_compact = time.monotonic()
+        return {
+            'journal': self._generation,
+            'schemes': self.schemes(),
+            'invites': [dict(invite) for invites in self._by_scheme.values() for invite in invites.values()],
+        }
+
+    def _write_snapshot(self, snapshot):
+        path = os.path.join(self._directory, 'snapshot.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'), default=_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        for generation in range(snapshot['journal']):
+            if os.path.exists(self._journal_path(generation)):
+                os.remove(self._journal_path(generation))
+
+    def compact(self):
+        self._write_snapshot(self._rotate())
+
+    async def compact_async(self):
+        # The rotate and copy run on the loop so no mutation lands in between
+        snapshot = self._rotate()
+        await asyncio.to_thread(self._write_snapshot, snapshot)
+
+    async def _run_background(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush_async()
+                if (self._records_since_compact >= self._compact_min_records
+                        or (self._records_since_compact
+                            and time.monotonic() - self._last_compact >= self._compact_interval)):
+                    await self.compact_async()
+            except Exception:
+                logger.exception("Scheme journal write failed; will retry")
+
+    def close(self):
+        if self._background is not None:
+            self._background.cancel()
+            self._background = None
+        self.flush()
+        with self._io_lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+                self._journal_file_generation = None
@@ -0,0 +1,348 @@
+import sqlite3
+from datetime import datetime
+
+# Storage backends for btwscheme_app.py. Both keep the same three indexes:
+# (scheme, user_id), (user_id) and (scheme, status), so the bot commands are
+# lookups rather than scans over every scheme ever created.
+
+SCHEME_STATUSES = ['announced', 'happening', 'past']
+INVITE_STATUSES = ['Pending', 'Invited', 'Attending', 'Waitlist', 'Revoked']
+INVITE_FIELDS = ['user_name', 'email', 'cell', 'color', 'status', 'submit_date', 'last_modified',
+                 'diet', 'allergies', 'arrival', 'departure']
+DATE_FIELDS = ['submit_date', 'last_modified']
+
+
+class MemorySchemeStore:
+    # Plain dicts, lost on restart. Handy for local testing.
+    def __init__(self):
+        self._schemes = {}    # name -> scheme
+        self._by_scheme = {}  # name -> {user_id: invite}, the (scheme, user_id) index
+        self._by_user = {}    # user_id -> {name: invite}
+        self._by_status = {}  # (name, status) -> {user_id: invite}
+        self._status_counts = {}  # name -> {status: count}, bumped on every transition
+
+    def close(self):
+        pass
+
+    def create_scheme(self, name, description, status='announced'):
+        if name in self._schemes:
+            return False
+        self._schemes[name] = {'name': name, 'description': description, 'status': status}
+        self._by_scheme[name] = {}
+        self._status_counts[name] = {status: 0 for status in INVITE_STATUSES}
+        return True
+
+    def get_scheme(self, name):
+        scheme = self._schemes.get(name)
+        return dict(scheme) if scheme else None
+
+    def schemes(self):
+        return [dict(scheme) for scheme in self._schemes.values()]
+
+    def set_scheme_status(self, name, status):
+        self._schemes[name]['status'] = status
+
+    def get_invite(self, name, user_id):
+        invite = self._by_scheme.get(name, {}).get(user_id)
+        return dict(invite) if invite else None
+
+    # All three indexes hold the same invite dict, so update_invite only has
+    # to move it between status buckets.
+    def add_invite(self, name, user_id, invite):
+        if user_id in self._by_scheme[name]:
+            return False
+        invite = dict(invite, scheme=name, user_id=user_id)
+        self._by_scheme[name][user_id] = invite
+        self._by_user.setdefault(user_id, {})[name] = invite
+        self._by_status.setdefault((name, invite['status']), {})[user_id] = invite
+        self._bump_count(name, invite['status'], 1)
+        return True
+
+    def update_invite(self, name, user_id, **fields):
+        invite = self._by_scheme[name][user_id]
+        old_status = invite['status']
+        invite.update(fields)
+        if invite['status'] != old_status:
+            del self._by_status[(name, old_status)][user_id]
+            self._by_status.setdefault((name, invite['status']), {})[user_id] = invite
+            self._bump_count(name, old_status, -1)
+            self._bump_count(name, invite['status'], 1)
+        return dict(invite)
+
+    # Applies many (user_id, status) changes at once; returns the ids that
+    # were updated and the ids with no invite in the scheme.
+    def bulk_update_status(self, name, changes, last_modified):
+        invites = self._by_scheme[name]
+        updated = [user_id for user_id, _ in changes if user_id in invites]
+        missing = [user_id for user_id, _ in changes if user_id not in invites]
+        for user_id, status in changes:
+            if user_id in invites:
+                self.update_invite(name, user_id, status=status, last_modified=last_modified)
+        return updated, missing
+
+    # Moves up to `limit` invites (oldest submit_date first, as in the SQLite
+    # store) from one status to another; returns the moved user ids.
+    def transition_status(self, name, from_status, to_status, limit, last_modified):
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        invites = self._by_status.get((name, from_status), {})
+        user_ids = sorted(invites, key=lambda user_id: invites[user_id].get('submit_date') or datetime.min)
+        if limit is not None:
+            user_ids = user_ids[:limit]
+        for user_id in user_ids:
+            self.update_invite(name, user_id, status=to_status, last_modified=last_modified)
+        return user_ids
+
+    def _bump_count(self, name, status, delta):
+        counts = self._status_counts[name]
+        counts[status] = counts.get(status, 0) + delta
+
+    def scheme_invites(self, name):
+        return [dict(invite) for invite in self._by_scheme.get(name, {}).values()]
+
+    def scheme_invite_batches(self, name, batch_size=200):
+        invites = list(self._by_scheme.get(name, {}).values())
+        for start in range(0, len(invites), batch_size):
+            yield [dict(invite) for invite in invites[start:start + batch_size]]
+
+    # Every invite the user holds, with the scheme's description and status
+    # attached, so callers never go back to the store per invite.
+    def user_invites(self, user_id):
+        return [dict(invite,
+                     scheme_description=self._schemes[name]['description'],
+                     scheme_status=self._schemes[name]['status'])
+                for name, invite in self._by_user.get(user_id, {}).items()]
+
+    def invites_with_status(self, name, status):
+        return [dict(invite) for invite in self._by_status.get((name, status), {}).values()]
+
+    def count_by_status(self, name):
+        return dict(self._status_counts.get(name) or {status: 0 for status in INVITE_STATUSES})
+
+    def recount_by_status(self, name):
+        counts = {status: 0 for status in INVITE_STATUSES}
+        for invite in self._by_scheme.get(name, {}).values():
+            counts[invite['status']] = counts.get(invite['status'], 0) + 1
+        return counts
+
+
+class SQLiteSchemeStore:
+    # Durable local stand-in for the Postgres database in btw_env.yaml.
+    def __init__(self, path):
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS schemes (
+                    name TEXT PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    status TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS invites (
+                    scheme TEXT NOT NULL REFERENCES schemes (name),
+                    user_id INTEGER NOT NULL,
+                    user_name TEXT,
+                    email TEXT,
+                    cell TEXT,
+                    color TEXT,
+                    status TEXT NOT NULL,
+                    submit_date TEXT,
+                    last_modified TEXT,
+                    diet TEXT,
+                    allergies TEXT,
+                    arrival TEXT,
+                    departure TEXT,
+                    PRIMARY KEY (scheme, user_id)
+                );
+                CREATE INDEX IF NOT EXISTS invites_user_id ON invites (user_id);
+                CREATE INDEX IF NOT EXISTS invites_scheme_status ON invites (scheme, status);
+
+                -- Per-scheme status counters, kept current by triggers in the
+                -- same transaction as the invite write.
+                CREATE TABLE IF NOT EXISTS scheme_status_counts (
+                    scheme TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (scheme, status)
+                ) WITHOUT ROWID;
+                CREATE TRIGGER IF NOT EXISTS invites_count_insert AFTER INSERT ON invites BEGIN
+                    INSERT INTO scheme_status_counts (scheme, status, count) VALUES (NEW.scheme, NEW.status, 1)
+                        ON CONFLICT (scheme, status) DO UPDATE SET count = count + 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS invites_count_update AFTER UPDATE OF status ON invites
+                WHEN OLD.status != NEW.status BEGIN
+                    UPDATE scheme_status_counts SET count = count - 1 WHERE scheme = OLD.scheme AND status = OLD.status;
+                    INSERT INTO scheme_status_counts (scheme, status, count) VALUES (NEW.scheme, NEW.status, 1)
+                        ON CONFLICT (scheme, status) DO UPDATE SET count = count + 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS invites_count_delete AFTER DELETE ON invites BEGIN
+                    UPDATE scheme_status_counts SET count = count - 1 WHERE scheme = OLD.scheme AND status = OLD.status;
+                END;
+            """)
+            columns = [row['name'] for row in self._db.execute("PRAGMA table_info(invites)")]
+            if 'user_name' not in columns:
+                self._db.execute("ALTER TABLE invites ADD COLUMN user_name TEXT")
+            # Databases written before the counters existed need one full recount
+            has_counts = self._db.execute("SELECT 1 FROM scheme_status_counts LIMIT 1").fetchone()
+            has_invites = self._db.execute("SELECT 1 FROM invites LIMIT 1").fetchone()
+            if has_invites and not has_counts:
+                self._db.execute("INSERT INTO scheme_status_counts (scheme, status, count) "
+                                 "SELECT scheme, status, COUNT(*) FROM invites GROUP BY scheme, status")
+
+    def close(self):
+        self._db.close()
+
+    def create_scheme(self, name, description, status='announced'):
+        try:
+            with self._db:
+                self._db.execute("INSERT INTO schemes (name, description, status) VALUES (?, ?, ?)",
+                                 (name, description, status))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def get_scheme(self, name):
+        row = self._db.execute("SELECT * FROM schemes WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def schemes(self):
+        return [dict(row) for row in self._db.execute("SELECT * FROM schemes ORDER BY rowid")]
+
+    def set_scheme_status(self, name, status):
+        with self._db:
+            self._db.execute("UPDATE schemes SET status = ? WHERE name = ?", (status, name))
+
+    def get_invite(self, name, user_id):
+        row = self._db.execute("SELECT * FROM invites WHERE scheme = ? AND user_id = ?",
+                               (name, user_id)).fetchone()
+        return _invite_from_row(row) if row else None
+
+    def add_invite(self, name, user_id, invite):
+        fields = [field for field in INVITE_FIELDS if field in invite]
+        columns = ', '.join(['scheme', 'user_id'] + fields)
+        placeholders = ', '.join('?' * (len(fields) + 2))
+        try:
+            with self._db:
+                self._db.execute(f"INSERT INTO invites ({columns}) VALUES ({placeholders})",
+                                 [name, user_id] + [_to_db(invite[field]) for field in fields])
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update_invite(self, name, user_id, **fields):
+        for field in fields:
+            if field not in INVITE_FIELDS:
+                raise KeyError(f"Unknown invite field: {field}")
+        assignments = ', '.join(f"{field} = ?" for field in fields)
+        with self._db:
+            self._db.execute(f"UPDATE invites SET {assignments} WHERE scheme = ? AND user_id = ?",
+                             [_to_db(value) for value in fields.values()] + [name, user_id])
+        return self.get_invite(name, user_id)
+
+    def bulk_update_status(self, name, changes, last_modified):
+        updated = []
+        missing = []
+        with self._db:
+            for user_id, status in changes:
+                cursor = self._db.execute("UPDATE invites SET status = ?, last_modified = ? WHERE scheme = ? AND user_id = ?",
+                                          (status, _to_db(last_modified), name, user_id))
+                (updated if cursor.rowcount else missing).append(user_id)
+        return updated, missing
+
+    def transition_status(self, name, from_status, to_status, limit, last_modified):
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        with self._db:
+            # NULL submit dates sort first, like datetime.min in the memory store
+            rows = self._db.execute("SELECT rowid, user_id FROM invites WHERE scheme = ? AND status = ? "
+                                    "ORDER BY submit_date, rowid LIMIT ?",
+                                    (name, from_status, -1 if limit is None else limit)).fetchall()
+            self._db.executemany("UPDATE invites SET status = ?, last_modified = ? WHERE rowid = ?",
+                                 [(to_status, _to_db(last_modified), row['rowid']) for row in rows])
+        return [row['user_id'] for row in rows]
+
+    def scheme_invites(self, name):
+        rows = self._db.execute("SELECT * FROM invites WHERE scheme = ? ORDER BY rowid", (name,))
+        return [_invite_from_row(row) for row in rows]
+
+    # Keyset paging on rowid, so a slow consumer never holds a cursor open
+    def scheme_invite_batches(self, name, batch_size=200):
+        last_rowid = 0
+        while True:
+            rows = self._db.execute("SELECT rowid AS row_id, * FROM invites WHERE scheme = ? AND rowid > ? "
+                                    "ORDER BY rowid LIMIT ?", (name, last_rowid, batch_size)).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]['row_id']
+            batch = []
+            for row in rows:
+                invite = _invite_from_row(row)
+                del invite['row_id']
+                batch.append(invite)
+            yield batch
+
+    def user_invites(self, user_id):
+        rows = self._db.execute(
+            "SELECT invites.*, schemes.description AS scheme_description, schemes.status AS scheme_status "
+            "FROM invites JOIN schemes ON schemes.name = invites.scheme "
+            "WHERE invites.user_id = ?", (user_id,))
+        return [_invite_from_row(row) for row in rows]
+
+    def invites_with_status(self, name, status):
+        rows = self._db.execute("SELECT * FROM invites WHERE scheme = ? AND status = ?", (name, status))
+        return [_invite_from_row(row) for row in rows]
+
+    def count_by_status(self, name):
+        counts = {status: 0 for status in INVITE_STATUSES}
+        rows = self._db.execute("SELECT status, count FROM scheme_status_counts WHERE scheme = ?", (name,))
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
+    def recount_by_status(self, name):
+        counts = {status: 0 for status in INVITE_STATUSES}
+        rows = self._db.execute("SELECT status, COUNT(*) FROM invites WHERE scheme = ? GROUP BY status", (name,))
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
+
+# Compares the stored counters with a full recount; returns the schemes that
+# disagree as {name: (stored, recounted)}.
+def verify_status_counts(store):
+    mismatches = {}
+    for scheme in store.schemes():
+        stored = store.count_by_status(scheme['name'])
+        recounted = store.recount_by_status(scheme['name'])
+        if stored != recounted:
+            mismatches[scheme['name']] = (stored, recounted)
+    return mismatches
+
+
+def _to_db(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _invite_from_row(row):
+    invite = dict(row)
+    for field in DATE_FIELDS:
+        if invite.get(field):
+            invite[field] = datetime.fromisoformat(invite[field])
+    return invite
+
+
+# Store URLs look like SQLAlchemy's: 'memory://', 'sqlite:///path/to/file.sqlite3'
+# or 'journal:///path/to/dir' (memory store with a write-behind journal).
+def open_store(url):
+    if url == 'memory://':
+        return MemorySchemeStore()
+    if url.startswith('journal:///'):
+        from scheme_journal import JournalSchemeStore
+        return JournalSchemeStore(url[len('journal:///'):])
+    if url.startswith('sqlite:///'):
+        return SQLiteSchemeStore(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported scheme store URL: {url}")
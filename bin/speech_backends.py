@@ -0,0 +1,148 @@
+import logging
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Audio handed to backends: 16 kHz mono 16-bit PCM (LINEAR16)
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+# Speech backends for translate_mp3_lyrics_to_eng.py. Each one provides the
+# methods below, all safe to call from several threads at once:
+#     recognize(pcm, language_code)         -> [(seconds into the chunk, word), ...]
+#                                              (language_code None: backend's choice)
+#     detect_language(text)                 -> language code, or None if it cannot tell
+#     translate(texts, target, source=None) -> [{"translatedText": ..., "detectedSourceLanguage": ...}, ...]
+# plus `cache_key`, naming everything besides the input that changes results.
+
+
+class GoogleBackend:
+    # Cloud Speech-to-Text and Translation v2, one client of each shared by all threads
+    cache_key = f"google-speech_v1-LINEAR16-{SAMPLE_RATE}-word-offsets"
+
+    def __init__(self):
+        from google.cloud import speech_v1 as speech
+        from google.cloud import translate_v2 as translate
+        self._speech = speech
+        self.speech_client = speech.SpeechClient()
+        self.translate_client = translate.Client()
+
+    def recognize(self, content, language_code):
+        speech = self._speech
+        audio = speech.RecognitionAudio(content=content)
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=SAMPLE_RATE,
+            language_code=language_code or "en-US",
+            enable_word_time_offsets=True
+        )
+        response = self.speech_client.recognize(config=config, audio=audio)
+        words = []
+        for result in response.results:
+            for alternative in result.alternatives:
+                for word_info in alternative.words:
+                    words.append((word_info.start_time.total_seconds(), word_info.word))
+        return words
+
+    def detect_language(self, text):
+        return self.translate_client.detect_language(text)['language']
+
+    def translate(self, texts, target_language, source_language=None):
+        # Left to detect the source itself so every result says what it saw
+        return self.translate_client.translate(texts, target_language=target_language, format_="text")
+
+
+class LocalBackend:
+    # Runs offline: faster-whisper for recognition and language detection,
+    # Argos Translate for text. Whisper's `workers` lets that many chunks be
+    # recognized at once from the transcription threads.
+    def __init__(self, model="small", workers=1):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("The local backend needs faster-whisper (pip install faster-whisper)")
+        self.model = WhisperModel(model, device="auto", num_workers=max(1, workers))
+        self.cache_key = f"faster-whisper-{model}"
+        self.detected_language = None
+
+    def recognize(self, content, language_code):
+        audio = np.frombuffer(content, dtype=np.int16).astype(np.float32) / 32768.0
+        language = language_code.split("-")[0] if language_code else None
+        segments, info = self.model.transcribe(audio, language=language, word_timestamps=True)
+        words = [(word.start, word.word.strip()) for segment in segments for word in segment.words]
+        if not language_code:
+            self.detected_language = info.language
+        return words
+
+    def detect_language(self, text):
+        # Whisper detects from audio, not text: this is what it heard in the
+        # last chunk recognized without a language
+        return self.detected_language
+
+    def translate(self, texts, target_language, source_language=None):
+        source = (source_language or self.detected_language or "").split("-")[0]
+        if not source:
+            raise RuntimeError("The local backend needs the source language to translate; pass --lang")
+        if source == target_language:
+            return [{"translatedText": text, "detectedSourceLanguage": source} for text in texts]
+        try:
+            from argostranslate import translate
+        except ImportError:
+            raise RuntimeError("The local backend needs argostranslate with a language package installed")
+        return [{"translatedText": translate.translate(text, source, target_language), "detectedSourceLanguage": source}
+                for text in texts]
+
+
+class FakeBackend:
+    # Deterministic stand-in for tests and benchmarks. Every call sleeps
+    # `latency` like a round trip; words are made up from a hash of the audio
+    # and translations are the text upper-cased. A seeded `failure_rate`
+    # share of calls fail, so retries can be exercised repeatably.
+    cache_key = "fake"
+
+    def __init__(self, latency=0.0, words_per_chunk=120, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.words_per_chunk = words_per_chunk
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+        if failed:
+            raise RuntimeError("Simulated backend failure")
+
+    def recognize(self, content, language_code):
+        self._call()
+        step = len(content) / BYTES_PER_SECOND / self.words_per_chunk
+        tag = zlib.crc32(content) % 1000
+        return [(i * step, f"word{tag}_{i}") for i in range(self.words_per_chunk)]
+
+    def detect_language(self, text):
+        self._call()
+        return "de"
+
+    def translate(self, texts, target_language, source_language=None):
+        self._call()
+        return [{"translatedText": text.upper(), "detectedSourceLanguage": "de"} for text in texts]
+
+
+BACKENDS = ["google", "local", "fake"]
+
+
+def make_backend(name, local_model="small", workers=1):
+    if name == "google":
+        return GoogleBackend()
+    if name == "local":
+        return LocalBackend(local_model, workers)
+    if name == "fake":
+        return FakeBackend()
+    raise ValueError(f"Unknown speech backend: {name}")
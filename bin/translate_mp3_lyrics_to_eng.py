@@ -1,86 +1,444 @@
 import os
-import shutil
+import sys
+import glob
+import json
+import heapq
+import time
 import logging
 import argparse
-from google.cloud import speech_v1 as speech
-from google.cloud import translate_v2 as translate
-from pydub import AudioSegment
+import tempfile
+import threading
+from collections import Counter
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+from result_cache import ResultCache
+from speech_backends import BACKENDS, BYTES_PER_SECOND, SAMPLE_RATE, make_backend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger()
 
-def convert_wav_to_mp3(wav_file, output_dir):
-    logger.info(f"Converting WAV to MP3: {wav_file}")
-    audio = AudioSegment.from_wav(wav_file)
-    mp3_file = os.path.join(output_dir, os.path.basename(wav_file).replace(".wav", ".mp3"))
-    audio.export(mp3_file, format="mp3")
-    logger.info(f"Conversion complete: {mp3_file}")
-    return mp3_file
-
-def split_audio(mp3_file, output_dir, chunk_length_ms=60000):
-    logger.info(f"Splitting audio file into chunks: {mp3_file}")
-    audio = AudioSegment.from_mp3(mp3_file)
-    chunks = [audio[i:i + chunk_length_ms] for i in range(0, len(audio), chunk_length_ms)]
-    chunk_files = []
-    for i, chunk in enumerate(chunks):
-        chunk_file = os.path.join(output_dir, f"{os.path.basename(mp3_file)}_chunk{i}.mp3")
-        chunk.export(chunk_file, format="mp3")
-        chunk_files.append(chunk_file)
-    logger.info(f"Created {len(chunk_files)} chunks")
-    return chunk_files
-
-def transcribe_audio(mp3_file, language_code=None, offset=0):
-    logger.info(f"Transcribing audio chunk: {mp3_file}")
-    client = speech.SpeechClient()
-    with open(mp3_file, "rb") as audio_file:
-        content = audio_file.read()
-    audio = speech.RecognitionAudio(content=content)
-    config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.MP3,
-        sample_rate_hertz=16000,
-        language_code=language_code if language_code else "en-US",
-        enable_word_time_offsets=True
+# Chunks go to the speech backend as raw 16-bit mono PCM (LINEAR16):
+# lossless, no encode step, and under a minute at 16 kHz is under 2MB
+
+# Chunking: cut in the quietest 100ms frame between min and max seconds
+# (max stays under the recognizer's 60s limit), drop chunks that are silent
+# throughout and trim silence off the ends of the rest
+FRAME_SECONDS = 0.1
+FRAME_BYTES = int(SAMPLE_RATE * FRAME_SECONDS) * 2
+SILENCE_DBFS = -50.0
+SILENCE_MARGIN_FRAMES = 3  # keep a little silence around speech
+
+def iter_pcm_blocks(audio_file, block_seconds=10):
+    # Decodes the file once with ffmpeg (MP3 or WAV alike) and yields PCM a
+    # block at a time, so the decoded track is never held in memory. Errors
+    # go to a temporary file rather than a pipe: a damaged file can log more
+    # than a pipe holds, and ffmpeg would then stall before finishing stdout.
+    logger.info(f"Streaming audio file: {audio_file}")
+    stderr = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", audio_file,
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE, stderr=stderr
     )
-    response = client.recognize(config=config, audio=audio)
+    try:
+        while True:
+            block = process.stdout.read(block_seconds * BYTES_PER_SECOND)
+            if not block:
+                break
+            yield block
+    finally:
+        process.stdout.close()
+        process.wait()
+        stderr.seek(0)
+        errors = stderr.read().decode(errors="replace").strip()
+        stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {audio_file}: {errors}")
 
-    transcriptions = []
-    for result in response.results:
-        for alternative in result.alternatives:
-            for word_info in alternative.words:
-                transcriptions.append((word_info.start_time.total_seconds() + offset, word_info.word))
-    
-    logger.info(f"Transcription complete for chunk: {mp3_file} with {len(transcriptions)} words")
+def frame_levels(pcm):
+    # RMS level of each 100ms frame in dBFS, one vectorized pass
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame = FRAME_BYTES // 2
+    count = len(samples) // frame
+    if not count:
+        return np.full(1, -120.0)  # under 100ms is too short to hold a word
+    frames = samples[:count * frame].reshape(count, frame) / 32768.0
+    return 20 * np.log10(np.maximum(np.sqrt(np.mean(frames * frames, axis=1)), 1e-6))
+
+def voice_band_ratio(pcm):
+    # Share of spectral energy between 300 and 3400 Hz, where sung and spoken
+    # words carry most of theirs
+    samples = np.frombuffer(pcm, dtype=np.int16) / 32768.0
+    frame = FRAME_BYTES // 2
+    count = len(samples) // frame
+    if not count:
+        return 1.0
+    power = np.abs(np.fft.rfft(samples[:count * frame].reshape(count, frame), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame, 1 / SAMPLE_RATE)
+    total = power.sum()
+    return float(power[:, (freqs >= 300) & (freqs <= 3400)].sum() / total) if total else 0.0
+
+def find_cut(pcm, min_seconds):
+    # Byte offset of the middle of the quietest frame after min_seconds; the
+    # latest one wins ties so chunks stay long
+    levels = frame_levels(pcm)
+    first = int(min_seconds / FRAME_SECONDS)
+    quietest = len(levels) - 1 - int(np.argmin(levels[first:][::-1]))
+    return quietest * FRAME_BYTES + FRAME_BYTES // 2
+
+def iter_audio_chunks(audio_file, min_seconds=40, max_seconds=59, skip_instrumental=None, stats=None):
+    # Yields (offset seconds, PCM) for each chunk worth sending to the
+    # recognizer. With skip_instrumental set, chunks whose voice_band_ratio
+    # is below it are dropped too; that is a heuristic and off by default.
+    stats = stats if stats is not None else {}
+    for key in ("chunks", "silent", "instrumental"):
+        stats[key] = 0
+    stats["trimmed_seconds"] = 0.0
+    max_bytes = max_seconds * BYTES_PER_SECOND
+
+    def emit(pcm, offset):
+        levels = frame_levels(pcm)
+        loud = np.flatnonzero(levels >= SILENCE_DBFS)
+        if not len(loud):
+            stats["silent"] += 1
+            return None
+        start = max(0, int(loud[0]) - SILENCE_MARGIN_FRAMES) * FRAME_BYTES
+        end = min(len(pcm), (int(loud[-1]) + 1 + SILENCE_MARGIN_FRAMES) * FRAME_BYTES)
+        stats["trimmed_seconds"] += (len(pcm) - (end - start)) / BYTES_PER_SECOND
+        pcm = pcm[start:end]
+        if skip_instrumental is not None and voice_band_ratio(pcm) < skip_instrumental:
+            stats["instrumental"] += 1
+            return None
+        stats["chunks"] += 1
+        return offset + start / BYTES_PER_SECOND, pcm
+
+    buffer = bytearray()
+    offset = 0.0
+    for block in iter_pcm_blocks(audio_file):
+        buffer += block
+        while len(buffer) >= max_bytes:
+            cut = find_cut(bytes(buffer[:max_bytes]), min_seconds)
+            chunk = emit(bytes(buffer[:cut]), offset)
+            if chunk:
+                yield chunk
+            del buffer[:cut]
+            offset += cut / BYTES_PER_SECOND
+    if buffer:
+        chunk = emit(bytes(buffer), offset)
+        if chunk:
+            yield chunk
+    stats["audio_seconds"] = offset + len(buffer) / BYTES_PER_SECOND
+    logger.info(f"Chunked {audio_file}: {stats['chunks']} chunks to transcribe, {stats['silent']} silent and "
+                f"{stats['instrumental']} instrumental skipped, {stats['trimmed_seconds']:.0f}s of silence trimmed")
+
+def transcribe_audio(content, backend, language_code=None, offset=0, cache=None):
+    logger.info(f"Transcribing audio chunk at {offset}s")
+    # Cached words are relative to the chunk, so the same audio hits at any offset
+    key = cache.key(content, language_code or "", backend.cache_key) if cache else None
+    words = cache.get("recognize", key) if cache else None
+    if words is None:
+        words = backend.recognize(content, language_code)
+        if cache:
+            cache.put("recognize", key, words)
+    transcriptions = [(start + offset, word) for start, word in words]
+    logger.info(f"Transcription complete for chunk at {offset}s with {len(transcriptions)} words")
     return transcriptions
 
-def translate_text_preserve_newlines(text, target_language="en"):
-    logger.info("Translating text with newlines preserved")
-    client = translate.Client()
-    text = text.replace("\n\n", " [NEWLINE] ")
-    translation = client.translate(text, target_language=target_language)
-    translated_text = translation["translatedText"].replace(" [NEWLINE] ", "\n\n")
-    logger.info("Translation complete")
-    return translated_text
+def transcribe_with_retries(content, backend, language_code, offset, cache=None, retries=3):
+    for attempt in range(retries + 1):
+        try:
+            return transcribe_audio(content, backend, language_code, offset=offset, cache=cache)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Transcription of chunk at {offset}s failed (attempt {attempt + 1}), retrying: {e}")
+            time.sleep(2 ** attempt)
+
+def transcribe_chunks(chunks, language_code, backend, workers=1, cache=None, checkpoint=None):
+    # Takes (offset seconds, audio) pairs; returns one word list per chunk, in
+    # chunk order, and the language used.
+    # Chunks are pulled from the iterable only when a worker is close to free,
+    # so at most two per worker are held at once. Without a language code the
+    # first chunk is transcribed on its own so the language detected from it
+    # can be used for the rest, as before. Chunks already in the checkpoint
+    # are not recognized again; new ones are recorded there as they finish.
+    results = dict(checkpoint.chunks) if checkpoint else {}
+    chunks = enumerate(chunks)
+
+    def run(i, chunk):
+        offset, content = chunk
+        results[i] = transcribe_with_retries(content, backend, language_code, offset, cache)
+        if checkpoint:
+            checkpoint.chunk_done(i, offset, results[i], language_code)
+
+    if not language_code:
+        first = next(chunks, None)
+        if first is not None:
+            if 0 not in results:
+                run(*first)
+            if results[0]:  # Detect language using the first chunk if not provided
+                language_code = detect_language(" ".join(word for _, word in results[0]), backend, cache)
+                if checkpoint:
+                    checkpoint.set_language(language_code)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for i, chunk in chunks:
+            if i in results:
+                continue
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()  # re-raises a chunk that failed even after its retries
+            in_flight.add(pool.submit(run, i, chunk))
+        for future in in_flight:
+            future.result()
+    return [results[i] for i in range(len(results))], language_code
+
+# Translation requests are packed under these limits (the API takes up to
+# 128 segments and recommends staying under 5k characters per request)
+TRANSLATE_BATCH_CHARS = 4500
+TRANSLATE_BATCH_SEGMENTS = 100
+
+def pack_batches(texts, max_chars=TRANSLATE_BATCH_CHARS, max_segments=TRANSLATE_BATCH_SEGMENTS):
+    # Groups consecutive text indexes into requests under the limits; a text
+    # longer than max_chars gets a request of its own
+    batches = []
+    batch = []
+    size = 0
+    for i, text in enumerate(texts):
+        if batch and (size + len(text) > max_chars or len(batch) == max_segments):
+            batches.append(batch)
+            batch = []
+            size = 0
+        batch.append(i)
+        size += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
 
-def detect_language(text):
+def translate_batch(texts, backend, target_language, source_language=None, retries=3):
+    for attempt in range(retries + 1):
+        try:
+            return backend.translate(texts, target_language, source_language)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Translation batch of {len(texts)} paragraphs failed (attempt {attempt + 1}), retrying: {e}")
+            time.sleep(2 ** attempt)
+
+def translate_paragraphs(paragraphs, backend, target_language="en", source_language=None, cache=None, workers=4):
+    # Translates each paragraph, packing the ones not in the cache into
+    # batched requests sent `workers` at a time; a failed batch is retried on
+    # its own. Returns the translations in order and the source language
+    # most of the paragraphs were detected as. source_language is a hint for
+    # backends that cannot detect it themselves.
+    logger.info(f"Translating {len(paragraphs)} paragraphs")
+    translations = [None] * len(paragraphs)
+    sources = [None] * len(paragraphs)
+    keys = [cache.key(paragraph, target_language, backend.cache_key) for paragraph in paragraphs] if cache else []
+    todo = []
+    for i, paragraph in enumerate(paragraphs):
+        cached = cache.get("translate", keys[i]) if cache else None
+        if cached is not None:
+            translations[i], sources[i] = cached["text"], cached["source"]
+        else:
+            todo.append(i)
+
+    def run(batch):
+        response = translate_batch([paragraphs[i] for i in batch], backend, target_language, source_language)
+        for i, result in zip(batch, response):
+            translations[i] = result["translatedText"]
+            sources[i] = result.get("detectedSourceLanguage")
+            if cache:
+                cache.put("translate", keys[i], {"text": translations[i], "source": sources[i]})
+
+    batches = [[todo[j] for j in batch] for batch in pack_batches([paragraphs[i] for i in todo])]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(run, batches))  # re-raises a batch that failed even after its retries
+    detected = Counter(source for source in sources if source).most_common(1)
+    logger.info(f"Translation complete: {len(batches)} requests, {len(paragraphs) - len(todo)} paragraphs cached")
+    return translations, detected[0][0] if detected else None
+
+def detect_language(text, backend, cache=None):
     logger.info("Detecting language")
-    client = translate.Client()
-    detection = client.detect_language(text)
-    detected_language = detection['language']
+    key = cache.key(text, backend.cache_key) if cache else None
+    detected_language = cache.get("detect", key) if cache else None
+    if detected_language is None:
+        detected_language = backend.detect_language(text)
+        if cache and detected_language:
+            cache.put("detect", key, detected_language)
     logger.info(f"Detected language: {detected_language}")
     return detected_language
 
+def iter_paragraphs(chunk_results, pause_seconds):
+    # Merges the per-chunk word lists, each already in time order, and yields
+    # a paragraph's (timestamp, word) list whenever the gap to the next word
+    # is longer than pause_seconds
+    paragraph = []
+    for timestamp, word in heapq.merge(*chunk_results):
+        if paragraph and timestamp - paragraph[-1][0] > pause_seconds:
+            yield paragraph
+            paragraph = []
+        paragraph.append((timestamp, word))
+    if paragraph:
+        yield paragraph
+
+OUTPUT_FORMATS = ["txt", "srt", "vtt", "jsonl"]
+# Words only carry start times; a cue runs this long past its last word,
+# or up to the next cue if that starts sooner
+LAST_WORD_SECONDS = 1.0
+
+def format_timestamp(seconds, separator):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+def iter_output_lines(paragraphs, translations, output_format):
+    # txt is the translation alone, one paragraph per block; srt and vtt put
+    # each translated paragraph in a cue timed from its words; jsonl keeps
+    # the source text and every word's offset as well
+    if output_format == "vtt":
+        yield "WEBVTT\n\n"
+    for i, (words, translation) in enumerate(zip(paragraphs, translations)):
+        start = words[0][0]
+        end = words[-1][0] + LAST_WORD_SECONDS
+        if i + 1 < len(paragraphs):
+            end = max(start, min(end, paragraphs[i + 1][0][0]))
+        if output_format == "txt":
+            yield ("\n\n" if i else "") + translation
+        elif output_format == "srt":
+            yield f"{i + 1}\n{format_timestamp(start, ',')} --> {format_timestamp(end, ',')}\n{translation}\n\n"
+        elif output_format == "vtt":
+            yield f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{translation}\n\n"
+        else:
+            yield json.dumps({"start": start, "end": end, "text": " ".join(word for _, word in words),
+                              "translation": translation, "words": words}, ensure_ascii=False) + "\n"
+
 def save_translation_to_file(translation, output_file):
     logger.info(f"Saving translation to file: {output_file}")
     with open(output_file, "w", encoding="utf-8") as file:
-        file.write(translation)
+        file.writelines(translation)
     logger.info("Translation saved successfully")
 
-def main(config_file, audio_file, language_code, output_dir, save_temp, overwrite_translation, pause_seconds):
+AUDIO_EXTENSIONS = (".mp3", ".wav")
+
+class Checkpoint:
+    # Manifest for one job, kept next to its output: status, offset and words
+    # of every chunk transcribed so far, so a rerun after a crash only
+    # recognizes the missing chunks. It is rewritten atomically as each chunk
+    # finishes and deleted once the translation is saved. A manifest for a
+    # different version of the audio (size or mtime changed) is ignored.
+    def __init__(self, path, audio_file, chunking):
+        self.path = path
+        stat = os.stat(audio_file)
+        # Chunk indexes only line up between runs with the same chunking settings
+        self.source = {"audio_file": os.path.abspath(audio_file), "size": stat.st_size, "mtime": stat.st_mtime,
+                       "chunking": chunking, "sample_rate": SAMPLE_RATE}
+        self.language = None
+        self.chunks = {}   # chunk index -> [(seconds, word), ...]
+        self.offsets = {}  # chunk index -> seconds
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return
+        if manifest.get("source") != self.source:
+            logger.warning(f"Checkpoint {self.path} is for a different version of the audio, starting over")
+            return
+        self.language = manifest.get("language")
+        done = {int(i): chunk for i, chunk in manifest["chunks"].items() if chunk["status"] == "done"}
+        self.chunks = {i: [tuple(word) for word in chunk["words"]] for i, chunk in done.items()}
+        self.offsets = {i: chunk["offset"] for i, chunk in done.items()}
+        logger.info(f"Resuming from checkpoint {self.path}: {len(self.chunks)} chunks already transcribed")
+
+    def chunk_done(self, i, offset, words, language_code):
+        with self._lock:
+            self.chunks[i] = words
+            self.offsets[i] = offset
+            self.language = self.language or language_code
+            self._save()
+
+    def set_language(self, language_code):
+        with self._lock:
+            self.language = language_code
+            self._save()
+
+    def _save(self):
+        manifest = {
+            "source": self.source,
+            "language": self.language,
+            "chunks": {str(i): {"status": "done", "offset": self.offsets[i], "words": words}
+                       for i, words in sorted(self.chunks.items())},
+        }
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def output_path(audio_file, output_dir, input_dir=None, output_format="txt"):
+    # In batch mode the input directory's layout is mirrored under output_dir
+    name = os.path.splitext(os.path.basename(audio_file))[0] + "_translated." + output_format
+    if input_dir:
+        return os.path.normpath(os.path.join(output_dir, os.path.relpath(os.path.dirname(audio_file), input_dir), name))
+    return os.path.join(output_dir, name)
+
+def checkpoint_path(output_file):
+    return os.path.splitext(output_file)[0] + ".checkpoint.json"
+
+def translate_file(audio_file, output_file, language_code, pause_seconds, backend, workers=1, cache=None, skip_instrumental=None, output_format="txt"):
+    # Transcribes and translates one file; returns its numbers for the run summary
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    chunking = {"min_seconds": 40, "max_seconds": 59, "silence_dbfs": SILENCE_DBFS, "skip_instrumental": skip_instrumental}
+    checkpoint = Checkpoint(checkpoint_path(output_file), audio_file, chunking)
+    language_code = language_code or checkpoint.language
+    chunk_stats = {}
+    chunks = iter_audio_chunks(audio_file, chunking["min_seconds"], chunking["max_seconds"], skip_instrumental, chunk_stats)
+    chunk_results, language_code = transcribe_chunks(chunks, language_code, backend,
+                                                     workers=workers, cache=cache, checkpoint=checkpoint)
+    word_counts = [len(chunk_transcriptions) for chunk_transcriptions in chunk_results]
+
+    paragraphs = list(iter_paragraphs(chunk_results, pause_seconds))
+    translations, detected_source = translate_paragraphs([" ".join(word for _, word in words) for words in paragraphs],
+                                                         backend, "en", language_code, cache)
+    save_translation_to_file(iter_output_lines(paragraphs, translations, output_format), output_file)
+    checkpoint.remove()
+    logger.info(f"Translation saved to {output_file}")
+
+    logger.info(f"File name: {os.path.basename(audio_file)}")
+    logger.info(f"Source language: {language_code} (translation detected {detected_source})")
+    logger.info(f"Number of chunks: {len(chunk_results)} ({chunk_stats['silent']} silent and "
+                f"{chunk_stats['instrumental']} instrumental chunks skipped)")
+    for i, count in enumerate(word_counts):
+        logger.info(f"Words in chunk {i}: {count}")
+    if cache:
+        logger.info(f"Cache hits: {cache.summary()}")
+    return {"file": audio_file, "chunks": len(chunk_results), "words": sum(word_counts),
+            "audio_seconds": chunk_stats["audio_seconds"], "language": language_code,
+            "detected_source": detected_source}
+
+def main(config_file, audio_file, language_code, output_dir, save_temp, overwrite_translation, pause_seconds, workers=1, cache_dir=None, cache_size_mb=1024, skip_instrumental=None, output_format="txt", backend_name="google", local_model="small"):
     # Ensure the GOOGLE_APPLICATION_CREDENTIALS is set correctly
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = config_file
+    if config_file:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = config_file
 
-    output_file = os.path.join(output_dir, os.path.basename(audio_file).replace(".mp3", "_translated.txt").replace(".wav", "_translated.txt"))
+    output_file = output_path(audio_file, output_dir, output_format=output_format)
 
     if os.path.exists(output_file) and overwrite_translation.upper() == "N":
         logger.warning(f"Output file already exists: {output_file}")
@@ -94,7 +452,7 @@ def main(config_file, audio_file, language_code, output_dir, save_temp, overwrit
         logger.error(f"Audio file does not exist: {audio_file}")
         sys.exit(1)
     
-    if not os.path.exists(config_file):
+    if config_file and not os.path.exists(config_file):
         logger.error(f"Config file does not exist: {config_file}")
         sys.exit(1)
         
@@ -102,67 +460,89 @@ def main(config_file, audio_file, language_code, output_dir, save_temp, overwrit
         logger.error(f"Output directory does not exist: {output_dir}")
         sys.exit(1)
     
-    if audio_file.endswith(".wav"):
-        mp3_file = convert_wav_to_mp3(audio_file, output_dir)
-        audio_file_type = "wav"
-    else:
-        mp3_file = audio_file
-        audio_file_type = "mp3"
-
-    chunk_files = split_audio(mp3_file, output_dir)
-    transcriptions = []
-    word_counts = []
-    detected_language = None
-
-    for i, chunk_file in enumerate(chunk_files):
-        chunk_transcriptions = transcribe_audio(chunk_file, language_code, offset=i * 60)
-        transcriptions.extend(chunk_transcriptions)
-        if not language_code and i == 0 and chunk_transcriptions:  # Detect language using the first chunk if not provided
-            detected_language = detect_language(" ".join(word for _, word in chunk_transcriptions))
-            language_code = detected_language
-        
-        word_counts.append(len(chunk_transcriptions))
-        os.remove(chunk_file)  # Clean up the temporary chunk file after processing
-
-    # Sort transcriptions by timestamp
-    transcriptions.sort()
-
-    transcribed_text = ""
-    for i in range(len(transcriptions)):
-        timestamp, word = transcriptions[i]
-        if i > 0 and timestamp - transcriptions[i - 1][0] > pause_seconds:
-            transcribed_text += "\n\n"
-        transcribed_text += f"{word} "
-    
-    if transcriptions:
-        transcribed_text += "\n\n"  # Add two newlines after the last word
-
-    if audio_file_type == "wav" and save_temp.upper() == "Y":
-        temp_dir = os.path.join(output_dir, 'tempfiles')
-        os.makedirs(temp_dir, exist_ok=True)
-        shutil.copy(mp3_file, temp_dir)
-        logger.info(f"Temporary MP3 file saved to: {temp_dir}")
-        os.remove(mp3_file)  # Clean up the temporary mp3 file if originally a wav file
-
-    translated_text = translate_text_preserve_newlines(transcribed_text.strip(), "en")
-    save_translation_to_file(translated_text, output_file)
-    logger.info(f"Translation saved to {output_file}")
+    if save_temp.upper() == "Y":
+        logger.warning("--save-mp3 is ignored: audio is streamed to the recognizer and no temporary MP3 is written")
 
-    logger.info(f"File name: {os.path.basename(audio_file)}")
-    logger.info(f"Source language: {language_code}")
-    logger.info(f"Number of chunks: {len(chunk_files)}")
-    for i, count in enumerate(word_counts):
-        logger.info(f"Words in chunk {i}: {count}")
+    cache = ResultCache(cache_dir, cache_size_mb * 1024 * 1024) if cache_dir else None
+    backend = make_backend(backend_name, local_model, workers)
+    translate_file(audio_file, output_file, language_code, pause_seconds, backend, workers, cache, skip_instrumental, output_format)
+
+# Per-process backend for batch mode, created once by the pool initializer
+# and reused for every file that process handles
+_worker = {}
+
+def _init_worker(backend_name, local_model, workers, cache_dir, cache_size_mb):
+    _worker["backend"] = make_backend(backend_name, local_model, workers)
+    _worker["cache"] = ResultCache(cache_dir, cache_size_mb * 1024 * 1024) if cache_dir else None
+
+def _translate_file_in_worker(audio_file, output_file, language_code, pause_seconds, workers, skip_instrumental, output_format):
+    return translate_file(audio_file, output_file, language_code, pause_seconds,
+                          _worker["backend"], workers, _worker["cache"], skip_instrumental, output_format)
+
+def find_audio_files(input_dir, pattern):
+    return sorted(path for path in glob.glob(os.path.join(input_dir, pattern), recursive=True)
+                  if os.path.isfile(path) and path.lower().endswith(AUDIO_EXTENSIONS))
+
+def main_batch(config_file, input_dir, pattern, language_code, output_dir, overwrite_translation, pause_seconds, jobs, workers=1, cache_dir=None, cache_size_mb=1024, skip_instrumental=None, output_format="txt", backend_name="google", local_model="small"):
+    if config_file:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = config_file
+    todo = []
+    skipped = 0
+    for audio_file in find_audio_files(input_dir, pattern):
+        output_file = output_path(audio_file, output_dir, input_dir, output_format)
+        if os.path.exists(output_file) and overwrite_translation.upper() == "N":
+            skipped += 1
+            continue
+        todo.append((audio_file, output_file))
+    logger.info(f"Batch: {len(todo)} files to translate, {skipped} already done, {jobs} processes")
+
+    start = time.perf_counter()
+    done = []
+    failed = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(backend_name, local_model, workers, cache_dir, cache_size_mb)) as pool:
+        futures = {pool.submit(_translate_file_in_worker, audio_file, output_file, language_code, pause_seconds, workers, skip_instrumental, output_format): audio_file
+                   for audio_file, output_file in todo}
+        for future in as_completed(futures):
+            try:
+                done.append(future.result())
+            except Exception as e:
+                logger.error(f"Failed to translate {futures[future]}: {e}")
+                failed.append(futures[future])
+            logger.info(f"Batch progress: {len(done) + len(failed)}/{len(todo)}")
+
+    minutes = (time.perf_counter() - start) / 60
+    audio_minutes = sum(result["audio_seconds"] for result in done) / 60
+    logger.info(f"Batch complete: {len(done)} translated, {skipped} skipped, {len(failed)} failed in {minutes:.1f} min")
+    if done and minutes:
+        logger.info(f"Throughput: {len(done) / minutes:.2f} files/min, {audio_minutes / minutes:.1f} audio-minutes/min "
+                    f"({audio_minutes:.1f} audio minutes)")
+    for audio_file in failed:
+        logger.error(f"Failed: {audio_file}")
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Transcribe and translate audio files.")
-    parser.add_argument("-c", "--config", required=True, help="Path to the Google service account JSON file")
-    parser.add_argument("-f", "--file", required=True, help="Path to the audio file (MP3 or WAV)")
+    parser.add_argument("-c", "--config", help="Path to the Google service account JSON file (required for the google backend)")
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default="google", help="Speech and translation backend: google (cloud), local (faster-whisper + Argos Translate, offline) or fake (for testing); default google")
+    parser.add_argument("--local-model", default="small", help="Whisper model for the local backend (default small)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-f", "--file", help="Path to the audio file (MP3 or WAV)")
+    source.add_argument("-i", "--input-dir", help="Translate every MP3/WAV file under this directory matching --glob")
+    parser.add_argument("-g", "--glob", default="**/*", help="Pattern for files under --input-dir, '**' recurses (default '**/*')")
+    parser.add_argument("-j", "--jobs", type=int, default=max(1, min(4, os.cpu_count() or 1)), help="Files to process at once in --input-dir mode, one process each (default min(4, CPUs))")
     parser.add_argument("-l", "--lang", help="Language code of the audio file (e.g., 'de'), if not provided, the language will be detected <-- but not reliably!")
     parser.add_argument("-o", "--out-dir", required=True, help="Path to the output directory (must end with '/')")
-    parser.add_argument("-s", "--save-mp3", default="N", help="Save a copy of the temporary MP3 file if input is WAV ('Y' or 'N', default is 'N')")
-    parser.add_argument("-x", "--overwrite-translation", default="N", help="Overwrite translation txt file if it already exists ('Y' or 'N', default is 'N')")
+    parser.add_argument("-s", "--save-mp3", default="N", help="Ignored: WAV input is no longer converted to a temporary MP3 (kept for old scripts)")
+    parser.add_argument("-x", "--overwrite-translation", default="N", help="Overwrite translation txt file if it already exists ('Y' or 'N', default is 'N'); in --input-dir mode existing ones are skipped")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="txt", help="txt (translation only), srt/vtt (subtitles timed from the word offsets) or jsonl (one paragraph per line with source text and word offsets); default txt")
     parser.add_argument("-p", "--pause", type=float, default=2, help="Number of seconds pause between words after which to insert a newline (default is 2 seconds)")
+    parser.add_argument("--cache-dir", default=os.path.expanduser("~/.cache/btw_schemes"), help="Directory for cached recognitions and translations (default ~/.cache/btw_schemes)")
+    parser.add_argument("--cache-size-mb", type=int, default=1024, help="Evict least recently used cache entries past this size (default 1024)")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the speech and translation APIs")
+    parser.add_argument("--skip-instrumental", type=float, metavar="RATIO", help="Experimental: skip chunks with less than RATIO of their energy in the 300-3400 Hz voice band (e.g. 0.3); off by default")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of chunks to transcribe at once, sharing one speech client (default is 1)")
 
     args = parser.parse_args()
     
@@ -170,12 +550,27 @@ if __name__ == "__main__":
         logger.error(f"Output directory does not exist: {args.out_dir}")
         sys.exit(1)
     
-    if not os.path.exists(args.config):
+    if args.backend == "google" and not args.config:
+        logger.error("The google backend needs a service account file (-c)")
+        sys.exit(1)
+
+    if args.config and not os.path.exists(args.config):
         logger.error(f"Config file does not exist: {args.config}")
         sys.exit(1)
         
-    if not os.path.exists(args.file):
+    if args.file and not os.path.exists(args.file):
         logger.error(f"Audio file does not exist: {args.file}")
         sys.exit(1)
-    
-    main(args.config, args.file, args.lang, args.out_dir, args.save_mp3, args.overwrite_translation, args.pause)
+
+    if args.input_dir and not os.path.isdir(args.input_dir):
+        logger.error(f"Input directory does not exist: {args.input_dir}")
+        sys.exit(1)
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    if args.input_dir:
+        main_batch(args.config, args.input_dir, args.glob, args.lang, args.out_dir, args.overwrite_translation, args.pause,
+                   args.jobs, args.workers, cache_dir, args.cache_size_mb, args.skip_instrumental, args.format,
+                   args.backend, args.local_model)
+    else:
+        main(args.config, args.file, args.lang, args.out_dir, args.save_mp3, args.overwrite_translation, args.pause, args.workers,
+             cache_dir, args.cache_size_mb, args.skip_instrumental, args.format, args.backend, args.local_model)
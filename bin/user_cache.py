@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+# Resolves Discord user ids to users. The bot's own cache and guild member
+# data are checked first; whatever is left is fetched over HTTP with bounded
+# concurrency, and a fetch already in flight for an id is shared rather than
+# repeated. Results are kept for `ttl` seconds, least recently used first out.
+class UserCache:
+    def __init__(self, bot, max_size=5000, ttl=3600.0, max_concurrency=5):
+        self._bot = bot
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (expires_at, user)
+        self._in_flight = {}           # user_id -> future of the running fetch
+        self._fetch_slots = asyncio.Semaphore(max_concurrency)
+        self.hits = 0
+        self.fetches = 0
+
+    def _cached(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def _remember(self, user_id, user):
+        self._entries[user_id] = (time.monotonic() + self._ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def _local(self, user_id, guild):
+        user = self._bot.get_user(user_id)
+        if user is None and guild is not None:
+            user = guild.get_member(user_id)
+        return user
+
+    async def _fetch(self, user_id):
+        async with self._fetch_slots:
+            self.fetches += 1
+            try:
+                return await self._bot.fetch_user(user_id)
+            except discord.NotFound:
+                logger.warning(f"User {user_id} no longer exists")
+                return None
+
+    async def get(self, user_id, guild=None):
+        user = self._cached(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+        user = self._local(user_id, guild)
+        if user is None:
+            future = self._in_flight.get(user_id)
+            if future is None:
+                future = asyncio.ensure_future(self._fetch(user_id))
+                self._in_flight[user_id] = future
+                future.add_done_callback(lambda _: self._in_flight.pop(user_id, None))
+            user = await asyncio.shield(future)
+        if user is not None:
+            self._remember(user_id, user)
+        return user
+
+    # Resolves a batch of ids at once; returns {user_id: user or None}. A
+    # failed fetch (5xx, gave up on a rate limit) only blanks that one user
+    # rather than the whole listing; get() itself still raises, so callers
+    # like the DM queue can retry.
+    async def get_many(self, user_ids, guild=None):
+        user_ids = list(dict.fromkeys(user_ids))
+        results = await asyncio.gather(*(self.get(user_id, guild) for user_id in user_ids), return_exceptions=True)
+        users = {}
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not fetch user {user_id}: {result!r}")
+                result = None
+            users[user_id] = result
+        return users